@@ -1,24 +1,76 @@
 from __future__ import annotations
 
 import ast
-from collections.abc import Generator
-from importlib.metadata import version
-from typing import Any
+
+# Avoid importing typing at runtime, to keep Flake8's startup fast.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from collections.abc import (
+        Callable,
+        Collection,
+        Generator,
+        Iterable,
+        Sequence,
+    )
+    from typing import Any, TypeGuard
+
+
+class LazyVersion:
+    """
+    The package version, looked up on first access rather than at import
+    time, since importlib.metadata is slow to import and to search.
+    """
+
+    def __get__(self, instance: object, owner: type[object]) -> str:
+        from importlib.metadata import version
+
+        value = version("flake8-comprehensions")
+        setattr(owner, "version", value)  # noqa: B010
+        return value
 
 
 class ComprehensionChecker:
     """
     Flake8 plugin to help you write better list/set/dict comprehensions.
+
+    Separate instances can run in parallel threads. All state for a run is
+    local to run(), and runs never mutate the tables they read. The only
+    shared setting, reducers, is set by parse_options(), which Flake8 calls
+    once before checking; it must not be called while runs are in progress.
     """
 
     name = "flake8-comprehensions"
-    version = version("flake8-comprehensions")
+    version = LazyVersion()
 
     __slots__ = ("tree",)
 
     def __init__(self, tree: ast.AST) -> None:
         self.tree = tree
 
+    # Rules that are prone to false positives, so only run when selected.
+    opt_in_codes = ["C421", "C422", "C423", "C426", "C432"]
+
+    # Functions that consume an iterable without short-circuiting, for C423.
+    reducers = frozenset({"frozenset", "max", "min", "sorted", "sum"})
+
+    @classmethod
+    def add_options(cls, option_manager: Any) -> None:
+        option_manager.extend_default_ignore(cls.opt_in_codes)
+        option_manager.add_option(
+            "--comprehension-reducers",
+            default=",".join(sorted(cls.reducers)),
+            parse_from_config=True,
+            comma_separated_list=True,
+            help=(
+                "Functions that consume an iterable, for which C423 reports "
+                + "list comprehension arguments. (Default: %(default)s)"
+            ),
+        )
+
+    @classmethod
+    def parse_options(cls, options: Any) -> None:
+        cls.reducers = frozenset(options.comprehension_reducers)
+
     messages = {
         "C400": "C400 Unnecessary generator - rewrite as a list comprehension.",
         "C401": "C401 Unnecessary generator - rewrite as a set comprehension.",
@@ -34,7 +86,7 @@ class ComprehensionChecker:
         "C410": "C410 Unnecessary {type} passed to list() - ",
         "C411": "C411 Unnecessary list call - remove the outer call to list().",
         "C413": "C413 Unnecessary {outer} call around {inner}(){remediation}.",
-        "C414": "C414 Unnecessary {inner} call within {outer}().",
+        "C414": "C414 Unnecessary {inner} call within {outer}(){remediation}.",
         "C415": "C415 Unnecessary subscript reversal of iterable within {func}().",
         "C416": "C416 Unnecessary {type} comprehension - rewrite using {type}().",
         "C417": "C417 Unnecessary use of map - use a {comp} instead.",
@@ -49,324 +101,792 @@ class ComprehensionChecker:
         "C420": (
             "C420 Unnecessary {type} comprehension - rewrite using dict.fromkeys()."
         ),
+        "C421": (
+            "C421 Unnecessary {type} call - {name} is already annotated as a {type}."
+        ),
+        "C422": (
+            "C422 Unnecessary sequential await in {type} - run the calls "
+            + "concurrently with asyncio.gather() or a TaskGroup."
+        ),
+        "C423": (
+            "C423 Unnecessary list comprehension passed to {func}() - rewrite as "
+            + "a generator."
+        ),
+        "C424": (
+            "C424 Unnecessary {name}.count() call in a loop - count all items "
+            + "once with collections.Counter."
+        ),
+        "C425": (
+            "C425 Unnecessary {name}.{method}() call in a loop - look items up in "
+            + "a dict or set."
+        ),
+        "C426": (
+            "C426 Unnecessary {name}.{method}(0) call in a loop - use a "
+            + "collections.deque."
+        ),
+        "C427": (
+            "C427 Unnecessary quadratic concatenation with {func}() - flatten "
+            + "with itertools.chain.from_iterable() or a nested comprehension."
+        ),
+        "C428": (
+            "C428 Unnecessary range(len({name})) in comprehension - {remediation}."
+        ),
+        "C429": "C429 Unnecessary list call around range() - use the range directly.",
+        "C430": "C430 Unnecessary lambda - rewrite as operator.{getter}.",
+        "C431": "C431 Unnecessary generator passed to {func}() - rewrite as {rewrite}.",
+        "C432": "C432 Unnecessary generator passed to {func}() - rewrite as {rewrite}.",
+        "C433": (
+            "C433 Unnecessary {type} comprehension - its result is unused, "
+            + "rewrite as a for loop."
+        ),
+        "C434": (
+            "C434 Unnecessary generator passed to {func}() - pass the iterable "
+            + "directly."
+        ),
+        "C435": (
+            "C435 Unnecessary double lookup in {name} - use {name}.setdefault() "
+            + "or a collections.defaultdict."
+        ),
+        "C436": "C436 Unnecessary double lookup in {name} - use {name}.get().",
     }
 
     def run(self) -> Generator[tuple[int, int, str, type[Any]]]:
+        # Results are held back until the whole tree has been walked, since a
+        # builtin may be rebound after the code that uses it, for example by a
+        # module-level import below a function definition.
+        pending: list[PendingResult] = []
+        self._check_tree(self.tree, Scope(None, "module"), pending)
+        yield from resolve_pending(pending)
+
+    def _check_tree(
+        self, tree: ast.AST, module_scope: Scope, pending: list[PendingResult]
+    ) -> None:
+        """
+        Check a tree, adding its results to pending. A module can be checked
+        in several parts, one top-level statement at a time, by passing each
+        part the same module scope and pending list.
+        """
         # Stores previously seen map() nodes, to avoid raising C417 on it twice.
         visited_map_calls: set[ast.Call] = set()
+        # Stores calls within a chain already reported as a whole by C413/C414.
+        fused_calls: set[ast.Call] = set()
 
-        for node in ast.walk(self.tree):
-            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
-                num_positional_args = len(node.args)
-                num_keyword_args = len(node.keywords)
-
-                if (
-                    num_positional_args == 1
-                    and isinstance(node.args[0], ast.GeneratorExp)
-                    and node.func.id in ("list", "set")
-                ):
-                    msg_key = {"list": "C400", "set": "C401"}[node.func.id]
-                    yield (
-                        node.lineno,
-                        node.col_offset,
-                        self.messages[msg_key],
-                        type(self),
-                    )
-
-                elif (
-                    num_positional_args == 1
-                    and node.func.id == "dict"
-                    and len(node.keywords) == 0
-                    and isinstance(node.args[0], (ast.GeneratorExp, ast.ListComp))
-                    and isinstance(node.args[0].elt, ast.Tuple)
-                    and len(node.args[0].elt.elts) == 2
+        for node, scope in walk_scopes(tree, module_scope):
+            if type(node) in checked_node_types:
+                for result in self._check_node(
+                    node, scope, visited_map_calls, fused_calls
                 ):
-                    if isinstance(node.args[0], ast.GeneratorExp):
-                        msg = "C402"
+                    if result[2].startswith(("C413", "C414")):
+                        assert isinstance(node, ast.Call)
+                        self._fuse_chain(
+                            node,
+                            result,
+                            scope,
+                            visited_map_calls,
+                            fused_calls,
+                            pending,
+                        )
                     else:
-                        msg = "C404"
+                        names = relied_on_builtins(node, result)
+                        pending.append((result, names, scope, ()))
+
+    def _fuse_chain(
+        self,
+        node: ast.Call,
+        result: tuple[int, int, str, type[Any]],
+        scope: Scope,
+        visited_map_calls: set[ast.Call],
+        fused_calls: set[ast.Call],
+        pending: list[PendingResult],
+    ) -> None:
+        """
+        Add a C413 or C414 result to pending. On a chain of nested calls, like
+        list(sorted(list(x))), it covers the whole chain, falling back to the
+        results of each call on its own if any builtin in the chain turns out
+        to be rebound.
+        """
+        # A single layer relies only on its outer and inner builtins.
+        layer: PendingResult = (result, relied_on_builtins(node, result), scope, ())
+        fused, simplified = fuse_call_chain(node)
+        if len(fused) < 2:
+            pending.append(layer)
+            return
+        fused_calls.update(fused)
+        names = called_builtins(node)
+        chain_names = names[: len(fused) + 1]
+
+        fallback = [layer]
+        seen_map_calls = set(visited_map_calls)
+        for call in fused:
+            assert isinstance(call.func, ast.Name)
+            for call_result in self._check_builtin_call(
+                call, call.func.id, scope, seen_map_calls
+            ):
+                call_names = relied_on_builtins(call, call_result)
+                fallback.append((call_result, call_names, scope, ()))
+
+        message = self.messages[result[2][:4]].format(
+            inner=names[1], outer=names[0], remediation=f" - rewrite as {simplified}"
+        )
+        pending.append(
+            (
+                (result[0], result[1], message, result[3]),
+                chain_names,
+                scope,
+                tuple(fallback),
+            )
+        )
+
+        # A map() call that the fallback reports through C417 on the call
+        # around it is reported on its own while the chain is.
+        for map_call in seen_map_calls - visited_map_calls:
+            map_names = chain_names + called_builtins(map_call)
+            for map_result in self._check_builtin_call(
+                map_call, "map", scope, visited_map_calls
+            ):
+                pending.append((map_result, map_names, scope, ()))
+            visited_map_calls.add(map_call)
+
+    def _check_node(
+        self,
+        node: ast.AST,
+        scope: Scope,
+        visited_map_calls: set[ast.Call],
+        fused_calls: set[ast.Call],
+    ) -> Generator[tuple[int, int, str, type[Any]]]:
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            func_name = node.func.id
+            # Every rule below is for a call to one of these builtins, so
+            # checking the name first skips them all for most calls.
+            if func_name not in builtin_names and func_name not in self.reducers:
+                if func_name in other_call_names:
+                    yield from self._check_other_call(node, func_name)
+                return
+            if func_name in ("max", "min", "sorted"):
+                # Checked before skipping fused calls, since C413 and C414
+                # keep the key function as it is.
+                yield from self._check_key_function(node)
+            if node in fused_calls:
+                return
+
+            yield from self._check_builtin_call(
+                node, func_name, scope, visited_map_calls
+            )
+
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            if node.func.attr in other_call_names:
+                yield from self._check_other_call(node, node.func.attr)
+
+        elif isinstance(node, (ast.If, ast.IfExp)):
+            lookup = double_lookup(node)
+            if lookup is not None:
+                msg_key, container = lookup
+                yield (
+                    node.lineno,
+                    node.col_offset,
+                    self.messages[msg_key].format(name=ast.unparse(container)),
+                    type(self),
+                )
+
+        elif isinstance(node, ast.Expr):
+            if calls_per_item(node.value):
+                yield (
+                    node.value.lineno,
+                    node.value.col_offset,
+                    self.messages["C433"].format(type=comp_type[node.value.__class__]),
+                    type(self),
+                )
+
+        elif isinstance(node, (ast.DictComp, ast.ListComp, ast.SetComp)):
+            if (
+                len(node.generators) == 1
+                and not node.generators[0].ifs
+                and not node.generators[0].is_async
+            ):
+                if is_identity_comprehension(node):
                     yield (
                         node.lineno,
                         node.col_offset,
-                        self.messages[msg],
+                        self.messages["C416"].format(type=comp_type[node.__class__]),
                         type(self),
                     )
 
                 elif (
-                    num_positional_args == 1
-                    and isinstance(node.args[0], ast.ListComp)
-                    and node.func.id in ("list", "set", "any", "all")
+                    isinstance(node, ast.DictComp)
+                    and isinstance(node.key, ast.Name)
+                    and isinstance(node.value, ast.Constant)
+                    and isinstance(node.generators[0].target, ast.Name)
+                    and node.key.id == node.generators[0].target.id
                 ):
-                    msg_key = {
-                        "list": "C411",
-                        "set": "C403",
-                        "any": "C419",
-                        "all": "C419",
-                    }[node.func.id]
-                    msg = self.messages[msg_key].format(func=node.func.id)
                     yield (
                         node.lineno,
                         node.col_offset,
-                        msg,
+                        self.messages["C420"].format(type=comp_type[node.__class__]),
                         type(self),
                     )
 
-                elif num_positional_args == 1 and (
-                    isinstance(node.args[0], ast.Tuple)
-                    and node.func.id == "tuple"
-                    or isinstance(node.args[0], ast.List)
-                    and node.func.id == "list"
-                ):
-                    suffix = "remove the outer call to {func}()."
-                    msg_key = {"tuple": "C409", "list": "C410"}[node.func.id]
-                    msg = self.messages[msg_key] + suffix
+            if awaits_sequentially(node):
+                yield (
+                    node.lineno,
+                    node.col_offset,
+                    self.messages["C422"].format(
+                        type=f"{comp_type[node.__class__]} comprehension"
+                    ),
+                    type(self),
+                )
+
+        elif isinstance(node, (ast.AsyncFor, ast.For)):
+            if appends_awaited(node):
+                yield (
+                    node.lineno,
+                    node.col_offset,
+                    self.messages["C422"].format(type="for loop"),
+                    type(self),
+                )
+
+        if isinstance(
+            node, (ast.DictComp, ast.For, ast.GeneratorExp, ast.ListComp, ast.SetComp)
+        ):
+            for iterable in loop_iterables(node):
+                if is_list_of_range(iterable):
                     yield (
-                        node.lineno,
-                        node.col_offset,
-                        msg.format(
-                            type=type(node.args[0]).__name__.lower(), func=node.func.id
-                        ),
+                        iterable.lineno,
+                        iterable.col_offset,
+                        self.messages["C429"],
                         type(self),
                     )
-
-                elif (
-                    num_positional_args == 1
-                    and num_keyword_args == 0
-                    and isinstance(node.args[0], (ast.Dict, ast.DictComp))
-                    and node.func.id == "dict"
-                ):
-                    if isinstance(node.args[0], ast.Dict):
-                        type_ = "dict"
+            if not isinstance(node, ast.For):
+                indexing = range_len_indexing(node)
+                if indexing is not None:
+                    range_call, sequence, uses_index = indexing
+                    if uses_index:
+                        remediation = f"use enumerate({sequence})"
                     else:
-                        type_ = "dict comprehension"
+                        remediation = f"iterate over {sequence} directly"
                     yield (
-                        node.lineno,
-                        node.col_offset,
-                        self.messages["C418"].format(type=type_),
+                        range_call.lineno,
+                        range_call.col_offset,
+                        self.messages["C428"].format(
+                            name=sequence, remediation=remediation
+                        ),
                         type(self),
                     )
 
-                elif (
-                    num_positional_args == 1
-                    and isinstance(node.args[0], (ast.Tuple, ast.List))
-                    and (
-                        node.func.id in ("tuple", "list", "set")
-                        or (
-                            node.func.id == "dict"
-                            and all(
-                                isinstance(i, ast.Tuple) and len(i.elts) == 2
-                                for i in node.args[0].elts
-                            )
+        if type(node) in loop_node_types:
+            iterated = iterated_names(node)
+            for call, method, name in per_iteration_method_calls(node):
+                if method in ("pop", "insert"):
+                    if (
+                        len(call.args) == (1 if method == "pop" else 2)
+                        and not call.keywords
+                        and isinstance(call.args[0], ast.Constant)
+                        and call.args[0].value == 0
+                    ):
+                        yield (
+                            call.lineno,
+                            call.col_offset,
+                            self.messages["C426"].format(name=name, method=method),
+                            type(self),
                         )
-                    )
+                elif call.args and (
+                    name in iterated or scope.annotated_type(name) == "list"
                 ):
-                    suffix = "rewrite as a {func} literal."
-                    msg_key = {
-                        "tuple": "C409",
-                        "list": "C410",
-                        "set": "C405",
-                        "dict": "C406",
-                    }[node.func.id]
-                    msg = self.messages[msg_key] + suffix
                     yield (
-                        node.lineno,
-                        node.col_offset,
-                        msg.format(
-                            type=type(node.args[0]).__name__.lower(), func=node.func.id
+                        call.lineno,
+                        call.col_offset,
+                        self.messages["C424" if method == "count" else "C425"].format(
+                            name=name, method=method
                         ),
                         type(self),
                     )
 
-                elif (
-                    num_positional_args == 0
-                    and not has_star_args(node)
-                    and not has_double_star_args(node)
-                    and node.func.id == "dict"
-                ) or (
-                    num_positional_args == 0
-                    and num_keyword_args == 0
-                    and node.func.id in ("tuple", "list")
-                ):
-                    yield (
-                        node.lineno,
-                        node.col_offset,
-                        self.messages["C408"].format(type=node.func.id),
-                        type(self),
-                    )
+    def _check_builtin_call(
+        self,
+        node: ast.Call,
+        func_name: str,
+        scope: Scope,
+        visited_map_calls: set[ast.Call],
+    ) -> Generator[tuple[int, int, str, type[Any]]]:
+        """
+        Check a call to one of the builtins in builtin_names or reducers.
+        """
+        # Sub-tests shared by many rules are done once per call, by looking
+        # up the rules for the callee, the first argument's type, and the
+        # number of positional arguments in builtin_call_rules.
+        first_arg = node.args[0] if node.args else None
+        rules = builtin_call_rules.get(func_name, any_callee_rules)
+        key: tuple[type[Any], int] = (type(first_arg), min(len(node.args), max_arity))
+        if key not in rules:
+            key = (ast.expr, key[1])
+        if not rules[key]:
+            return
+        inner_func = (
+            first_arg.func.id
+            if isinstance(first_arg, ast.Call) and isinstance(first_arg.func, ast.Name)
+            else None
+        )
+        call = BuiltinCall(node, func_name, inner_func, scope, visited_map_calls)
+        for rule in rules[key]:
+            results = rule(self, call, first_arg)
+            if results is not None:
+                yield from results
+                return
 
-                elif (
-                    node.func.id in {"list", "reversed"}
-                    and num_positional_args > 0
-                    and isinstance(node.args[0], ast.Call)
-                    and isinstance(node.args[0].func, ast.Name)
-                    and node.args[0].func.id == "sorted"
-                ):
-                    remediation = ""
-                    if node.func.id == "reversed":
-                        reverse_flag_value: bool | None = False
-                        for keyword in node.args[0].keywords:
-                            if keyword.arg != "reverse":
-                                continue
-                            if isinstance(keyword.value, ast.Constant):
-                                reverse_flag_value = bool(keyword.value.value)
-                            else:
-                                # Complex value
-                                reverse_flag_value = None
-
-                        if reverse_flag_value is None:
-                            remediation = " - toggle reverse argument to sorted()"
-                        else:
-                            remediation = f" - use sorted(..., reverse={not reverse_flag_value!r})"
-
-                    msg = self.messages["C413"].format(
-                        inner=node.args[0].func.id,
-                        outer=node.func.id,
-                        remediation=remediation,
-                    )
-                    yield (
-                        node.lineno,
-                        node.col_offset,
-                        msg,
-                        type(self),
-                    )
+    # Rules for calls to builtins, matched by builtin_call_patterns. Each gets
+    # the call and its first positional argument, whose type and the number
+    # of positional arguments the pattern has already checked. It returns
+    # the results to report if it matches, else None.
 
-                elif (
-                    num_positional_args > 0
-                    and isinstance(node.args[0], ast.Call)
-                    and isinstance(node.args[0].func, ast.Name)
-                    and (
-                        (
-                            node.func.id in {"set", "sorted"}
-                            and node.args[0].func.id
-                            in {"list", "reversed", "sorted", "tuple"}
-                        )
-                        or (
-                            node.func.id in {"list", "tuple"}
-                            and node.args[0].func.id in {"list", "tuple"}
-                        )
-                        or (node.func.id == "set" and node.args[0].func.id == "set")
-                    )
-                ):
-                    yield (
-                        node.lineno,
-                        node.col_offset,
-                        self.messages["C414"].format(
-                            inner=node.args[0].func.id, outer=node.func.id
-                        ),
-                        type(self),
-                    )
+    def _check_generator_call(
+        self, call: BuiltinCall, first_arg: ast.GeneratorExp
+    ) -> list[tuple[int, int, str, type[Any]]]:
+        msg_key = {"list": "C400", "set": "C401"}[call.func_name]
+        return [call.result(self, self.messages[msg_key])]
 
-                elif (
-                    node.func.id in {"reversed", "set", "sorted"}
-                    and num_positional_args > 0
-                    and isinstance(node.args[0], ast.Subscript)
-                    and isinstance(node.args[0].slice, ast.Slice)
-                    and node.args[0].slice.lower is None
-                    and node.args[0].slice.upper is None
-                    and isinstance(node.args[0].slice.step, ast.UnaryOp)
-                    and isinstance(node.args[0].slice.step.op, ast.USub)
-                    and isinstance(node.args[0].slice.step.operand, ast.Constant)
-                    and node.args[0].slice.step.operand.value == 1
-                ):
-                    yield (
-                        node.lineno,
-                        node.col_offset,
-                        self.messages["C415"].format(func=node.func.id),
-                        type(self),
-                    )
+    def _check_dict_of_pairs(
+        self, call: BuiltinCall, first_arg: ast.GeneratorExp | ast.ListComp
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if (
+            call.node.keywords
+            or not isinstance(first_arg.elt, ast.Tuple)
+            or len(first_arg.elt.elts) != 2
+        ):
+            return None
+        if isinstance(first_arg, ast.GeneratorExp):
+            msg = "C402"
+        else:
+            msg = "C404"
+        return [call.result(self, self.messages[msg])]
 
-                elif (
-                    node.func.id == "map"
-                    and node not in visited_map_calls
-                    and len(node.args) == 2
-                    and isinstance(node.args[0], ast.Lambda)
-                ):
-                    yield (
-                        node.lineno,
-                        node.col_offset,
-                        self.messages["C417"].format(comp="generator expression"),
-                        type(self),
-                    )
+    def _check_list_comprehension_call(
+        self, call: BuiltinCall, first_arg: ast.ListComp
+    ) -> list[tuple[int, int, str, type[Any]]]:
+        msg_key = {
+            "list": "C411",
+            "set": "C403",
+            "any": "C419",
+            "all": "C419",
+        }[call.func_name]
+        return [call.result(self, self.messages[msg_key].format(func=call.func_name))]
 
-                elif (
-                    node.func.id in ("list", "set", "dict")
-                    and len(node.args) == 1
-                    and isinstance(node.args[0], ast.Call)
-                    and isinstance(node.args[0].func, ast.Name)
-                    and node.args[0].func.id == "map"
-                    and len(node.args[0].args) == 2
-                    and isinstance(node.args[0].args[0], ast.Lambda)
-                ):
-                    # To avoid raising C417 on the map() call inside the list/set/dict.
-                    map_call = node.args[0]
-                    visited_map_calls.add(map_call)
-
-                    rewriteable = True
-                    if node.func.id == "dict":
-                        # For the generator expression to be rewriteable as a
-                        # dict comprehension, its lambda must return a 2-tuple.
-                        lambda_node = node.args[0].args[0]
-                        if (
-                            not isinstance(lambda_node.body, (ast.List, ast.Tuple))
-                            or len(lambda_node.body.elts) != 2
-                        ):
-                            rewriteable = False
-
-                    if rewriteable:
-                        comprehension_type = f"{node.func.id} comprehension"
-                        yield (
-                            node.lineno,
-                            node.col_offset,
-                            self.messages["C417"].format(comp=comprehension_type),
-                            type(self),
-                        )
+    def _check_len_of_list(
+        self, call: BuiltinCall, first_arg: ast.Call
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if not is_list_of_range(first_arg):
+            return None
+        return [
+            (first_arg.lineno, first_arg.col_offset, self.messages["C429"], type(self))
+        ]
 
-            elif isinstance(node, (ast.DictComp, ast.ListComp, ast.SetComp)):
-                if (
-                    len(node.generators) == 1
-                    and not node.generators[0].ifs
-                    and not node.generators[0].is_async
-                ):
-                    if (
-                        isinstance(node, (ast.ListComp, ast.SetComp))
-                        and isinstance(node.elt, ast.Name)
-                        and isinstance(node.generators[0].target, ast.Name)
-                        and node.elt.id == node.generators[0].target.id
-                    ) or (
-                        isinstance(node, ast.DictComp)
-                        and isinstance(node.key, ast.Name)
-                        and isinstance(node.value, ast.Name)
-                        and isinstance(node.generators[0].target, ast.Tuple)
-                        and len(node.generators[0].target.elts) == 2
-                        and isinstance(node.generators[0].target.elts[0], ast.Name)
-                        and node.generators[0].target.elts[0].id == node.key.id
-                        and isinstance(node.generators[0].target.elts[1], ast.Name)
-                        and node.generators[0].target.elts[1].id == node.value.id
-                    ):
-                        yield (
-                            node.lineno,
-                            node.col_offset,
-                            self.messages["C416"].format(
-                                type=comp_type[node.__class__]
-                            ),
-                            type(self),
-                        )
+    def _check_membership_test(
+        self, call: BuiltinCall, first_arg: ast.GeneratorExp
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if call.node.keywords:
+            return None
+        membership = membership_rewrite(call.func_name, first_arg)
+        if not membership:
+            return None
+        msg_key, rewrite = membership
+        msg = self.messages[msg_key].format(func=call.func_name, rewrite=rewrite)
+        return [call.result(self, msg)]
 
-                    elif (
-                        isinstance(node, ast.DictComp)
-                        and isinstance(node.key, ast.Name)
-                        and isinstance(node.value, ast.Constant)
-                        and isinstance(node.generators[0].target, ast.Name)
-                        and node.key.id == node.generators[0].target.id
-                    ):
-                        yield (
-                            node.lineno,
-                            node.col_offset,
-                            self.messages["C420"].format(
-                                type=comp_type[node.__class__]
-                            ),
-                            type(self),
-                        )
+    def _check_identity_generator(
+        self, call: BuiltinCall, first_arg: ast.GeneratorExp
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if not is_identity_comprehension(first_arg):
+            return None
+        return [call.result(self, self.messages["C434"].format(func=call.func_name))]
+
+    def _check_sum_of_sequences(
+        self, call: BuiltinCall, first_arg: ast.expr | None
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if not isinstance(sum_start(call.node), (ast.List, ast.Tuple)):
+            return None
+        return [call.result(self, self.messages["C427"].format(func=call.func_name))]
+
+    def _check_reducer_comprehension(
+        self, call: BuiltinCall, first_arg: ast.ListComp
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        # The reducers can be configured, so are checked here rather than
+        # in the table.
+        if call.func_name not in self.reducers:
+            return None
+        return [call.result(self, self.messages["C423"].format(func=call.func_name))]
+
+    def _check_literal_in_same_call(
+        self, call: BuiltinCall, first_arg: ast.List | ast.Tuple
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if type(first_arg).__name__.lower() != call.func_name:
+            return None
+        msg_key = {"tuple": "C409", "list": "C410"}[call.func_name]
+        msg = self.messages[msg_key] + "remove the outer call to {func}()."
+        return [call.result(self, msg.format(type=call.func_name, func=call.func_name))]
+
+    def _check_dict_in_dict(
+        self, call: BuiltinCall, first_arg: ast.Dict | ast.DictComp
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if call.node.keywords:
+            return None
+        if isinstance(first_arg, ast.Dict):
+            type_ = "dict"
+        else:
+            type_ = "dict comprehension"
+        return [call.result(self, self.messages["C418"].format(type=type_))]
+
+    def _check_literal_call(
+        self, call: BuiltinCall, first_arg: ast.List | ast.Tuple
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if call.func_name == "dict" and not all(
+            isinstance(i, ast.Tuple) and len(i.elts) == 2 for i in first_arg.elts
+        ):
+            return None
+        msg_key = {
+            "tuple": "C409",
+            "list": "C410",
+            "set": "C405",
+            "dict": "C406",
+        }[call.func_name]
+        msg = self.messages[msg_key] + "rewrite as a {func} literal."
+        return [
+            call.result(
+                self,
+                msg.format(type=type(first_arg).__name__.lower(), func=call.func_name),
+            )
+        ]
+
+    def _check_empty_call(
+        self, call: BuiltinCall, first_arg: None
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if call.func_name == "dict":
+            if has_double_star_args(call.node):
+                return None
+        elif call.node.keywords:
+            return None
+        return [call.result(self, self.messages["C408"].format(type=call.func_name))]
+
+    def _check_sorted_in_call(
+        self, call: BuiltinCall, first_arg: ast.Call
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if call.inner_func != "sorted":
+            return None
+        remediation = ""
+        if call.func_name == "reversed":
+            reverse_flag_value = sorted_reverse_flag(first_arg)
+            if reverse_flag_value is None:
+                remediation = " - toggle reverse argument to sorted()"
+            else:
+                remediation = f" - use sorted(..., reverse={not reverse_flag_value!r})"
+
+        msg = self.messages["C413"].format(
+            inner=call.inner_func,
+            outer=call.func_name,
+            remediation=remediation,
+        )
+        return [call.result(self, msg)]
+
+    def _check_inner_call(
+        self, call: BuiltinCall, first_arg: ast.Call
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if call.inner_func not in unnecessary_inner_calls[call.func_name]:
+            return None
+        msg = self.messages["C414"].format(
+            inner=call.inner_func, outer=call.func_name, remediation=""
+        )
+        return [call.result(self, msg)]
+
+    def _check_reversed_subscript(
+        self, call: BuiltinCall, first_arg: ast.Subscript
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if not (
+            isinstance(first_arg.slice, ast.Slice)
+            and first_arg.slice.lower is None
+            and first_arg.slice.upper is None
+            and isinstance(first_arg.slice.step, ast.UnaryOp)
+            and isinstance(first_arg.slice.step.op, ast.USub)
+            and isinstance(first_arg.slice.step.operand, ast.Constant)
+            and first_arg.slice.step.operand.value == 1
+        ):
+            return None
+        return [call.result(self, self.messages["C415"].format(func=call.func_name))]
+
+    def _check_map_call(
+        self, call: BuiltinCall, first_arg: ast.Lambda
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if call.node in call.visited_map_calls:
+            return None
+        msg = self.messages["C417"].format(comp="generator expression")
+        return [call.result(self, msg)]
+
+    def _check_map_in_call(
+        self, call: BuiltinCall, first_arg: ast.Call
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if (
+            call.inner_func != "map"
+            or len(first_arg.args) != 2
+            or not isinstance(first_arg.args[0], ast.Lambda)
+        ):
+            return None
+        # To avoid raising C417 on the map() call inside the list/set/dict.
+        call.visited_map_calls.add(first_arg)
+
+        lambda_node = first_arg.args[0]
+        # For the generator expression to be rewriteable as a dict
+        # comprehension, its lambda must return a 2-tuple.
+        if call.func_name != "dict" or (
+            isinstance(lambda_node.body, (ast.List, ast.Tuple))
+            and len(lambda_node.body.elts) == 2
+        ):
+            comprehension_type = f"{call.func_name} comprehension"
+            msg = self.messages["C417"].format(comp=comprehension_type)
+            return [call.result(self, msg)]
+        elif getter := getter_rewrite(lambda_node):
+            return [
+                (
+                    lambda_node.lineno,
+                    lambda_node.col_offset,
+                    self.messages["C430"].format(getter=getter),
+                    type(self),
+                )
+            ]
+        return []
+
+    def _check_annotated_call(
+        self, call: BuiltinCall, first_arg: ast.Name
+    ) -> list[tuple[int, int, str, type[Any]]] | None:
+        if (
+            call.node.keywords
+            or call.scope.annotated_type(first_arg.id) != call.func_name
+        ):
+            return None
+        msg = self.messages["C421"].format(type=call.func_name, name=first_arg.id)
+        return [call.result(self, msg)]
+
+    def _check_other_call(
+        self, node: ast.Call, func_name: str
+    ) -> Generator[tuple[int, int, str, type[Any]]]:
+        """
+        Check a call to a function or method other than a builtin, called as
+        either name() or obj.name().
+        """
+        if (
+            func_name == "reduce"
+            and (
+                isinstance(node.func, ast.Name)
+                or isinstance(node.func, ast.Attribute)
+                and isinstance(node.func.value, ast.Name)
+                and node.func.value.id == "functools"
+            )
+            and len(node.args) in (2, 3)
+            and not node.keywords
+            and concatenates(node.args[0])
+            and (
+                len(node.args) == 3
+                and isinstance(node.args[2], (ast.List, ast.Tuple))
+                or isinstance(node.args[0], ast.Attribute)
+                and node.args[0].attr == "concat"
+            )
+        ):
+            yield (
+                node.lineno,
+                node.col_offset,
+                self.messages["C427"].format(func=func_name),
+                type(self),
+            )
+
+        elif (
+            func_name == "sort"
+            and isinstance(node.func, ast.Attribute)
+            or func_name in ("merge", "nlargest", "nsmallest")
+            and (
+                isinstance(node.func, ast.Name)
+                or isinstance(node.func, ast.Attribute)
+                and isinstance(node.func.value, ast.Name)
+                and node.func.value.id == "heapq"
+            )
+        ):
+            yield from self._check_key_function(node)
+
+    def _check_key_function(
+        self, node: ast.Call
+    ) -> Generator[tuple[int, int, str, type[Any]]]:
+        """
+        Check the key= argument of a call like sorted() or list.sort().
+        """
+        for keyword in node.keywords:
+            if keyword.arg == "key" and (getter := getter_rewrite(keyword.value)):
+                yield (
+                    keyword.value.lineno,
+                    keyword.value.col_offset,
+                    self.messages["C430"].format(getter=getter),
+                    type(self),
+                )
+
+
+# A result from check_sources(): the source's name, line, zero-based column,
+# and message.
+Result = tuple[str, int, int, str]
+
+
+def check_sources(
+    sources: Iterable[tuple[str, bytes | str]],
+    *,
+    workers: int = 1,
+    batch_size: int = 64,
+    threads: bool = False,
+    large_file_bytes: int | None = None,
+    select: Sequence[str] | None = None,
+    extend_select: Sequence[str] = (),
+    disable_noqa: bool = False,
+) -> Generator[Result]:
+    """
+    Check many sources without Flake8, yielding a result tuple for each
+    problem found, in the order the sources were given. Sources that cannot be
+    parsed yield an E999 result, as in Flake8.
+
+    Codes are chosen by prefix as with Flake8's select and extend_select
+    settings, so by default the opt-in codes are not reported. Results on
+    lines with ``# noqa`` comments are skipped unless disable_noqa is true.
+
+    With workers > 1, sources are checked in batches in a process pool, or a
+    thread pool if threads is true. Threads avoid pickling sources and results,
+    and check in parallel on free-threaded Python builds. Only a few batches
+    are in flight at once, so sources can be a lazy iterable of any length.
+
+    Sources longer than large_file_bytes are checked one top-level statement
+    at a time, bounding memory use for very large modules, such as generated
+    ones.
+    """
+    options = (large_file_bytes, select, extend_select, disable_noqa)
+    if workers <= 1:
+        checker = ComprehensionChecker(ast.Module(body=[], type_ignores=[]))
+        for name, source in sources:
+            yield from check_source(checker, name, source, *options)
+        return
+
+    from collections import deque
+    from concurrent.futures import (
+        Executor,
+        Future,
+        ProcessPoolExecutor,
+        ThreadPoolExecutor,
+    )
+    from itertools import islice
+
+    iterator = iter(sources)
+    executor: Executor
+    if threads:
+        executor = ThreadPoolExecutor(workers)
+    else:
+        executor = ProcessPoolExecutor(workers)
+    with executor:
+        pending: deque[Future[list[Result]]] = deque()
+        while batch := list(islice(iterator, batch_size)):
+            pending.append(executor.submit(check_batch, batch, options))
+            if len(pending) > 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def check_batch(
+    batch: list[tuple[str, bytes | str]],
+    options: tuple[int | None, Sequence[str] | None, Sequence[str], bool],
+) -> list[Result]:
+    # Each batch gets its own checker, as checkers are not safe to share
+    # between threads.
+    checker = ComprehensionChecker(ast.Module(body=[], type_ignores=[]))
+    return [
+        result
+        for name, source in batch
+        for result in check_source(checker, name, source, *options)
+    ]
+
+
+def check_source(
+    checker: ComprehensionChecker,
+    name: str,
+    source: bytes | str,
+    large_file_bytes: int | None = None,
+    select: Sequence[str] | None = None,
+    extend_select: Sequence[str] = (),
+    disable_noqa: bool = False,
+) -> Generator[Result]:
+    results = filter_results(
+        source,
+        source_results(checker, name, source, large_file_bytes),
+        select,
+        extend_select,
+        disable_noqa,
+    )
+    for line, col, message in results:
+        yield (name, line, col, message)
+
+
+def source_results(
+    checker: ComprehensionChecker,
+    name: str,
+    source: bytes | str,
+    large_file_bytes: int | None,
+) -> list[tuple[int, int, str]]:
+    if large_file_bytes is not None and len(source) > large_file_bytes:
+        from flake8_comprehensions._chunked import check_in_chunks
+
+        chunked_results = check_in_chunks(checker, source)
+        # Syntax errors are reported by parsing as normal below.
+        if chunked_results is not None:
+            return [(line, col, message) for line, col, message, _ in chunked_results]
+
+    try:
+        checker.tree = ast.parse(source, name)
+    except (SyntaxError, ValueError) as exc:
+        line, col = 1, 0
+        if isinstance(exc, SyntaxError):
+            line = exc.lineno or 1
+            col = max((exc.offset or 1) - 1, 0)
+        return [(line, col, f"E999 {type(exc).__name__}: {exc.args[0]}")]
+    return [
+        (line, col, message)
+        for line, col, message, _ in sorted(
+            checker.run(), key=lambda result: (result[0], result[1])
+        )
+    ]
+
+
+def filter_results(
+    source: bytes | str,
+    results: list[tuple[int, int, str]],
+    select: Sequence[str] | None,
+    extend_select: Sequence[str] = (),
+    disable_noqa: bool = False,
+) -> list[tuple[int, int, str]]:
+    """
+    Drop (line, col, message) results for codes that are not selected, or
+    that noqa comments in the source skip.
+    """
+    results = [
+        result
+        for result in results
+        if is_selected(result[2].split(" ", 1)[0], select, extend_select)
+    ]
+    if results and not disable_noqa:
+        from flake8_comprehensions._noqa import remove_noqa
+
+        results = remove_noqa(source, results)
+    return results
+
+
+def is_selected(
+    code: str, select: Sequence[str] | None, extend_select: Sequence[str] = ()
+) -> bool:
+    """
+    Whether a code is reported, following Flake8's select and extend_select
+    settings, with the opt-in codes ignored by default.
+    """
+    if code.startswith((*(select or ()), *extend_select)):
+        return True
+    if select is not None:
+        return False
+    return code not in ComprehensionChecker.opt_in_codes
 
 
 def has_star_args(call_node: ast.Call) -> bool:
@@ -377,8 +897,1082 @@ def has_double_star_args(call_node: ast.Call) -> bool:
     return any(k.arg is None for k in call_node.keywords)
 
 
+# For each builtin, the builtin calls that are unnecessary within it (C414).
+unnecessary_inner_calls = {
+    "list": frozenset({"list", "tuple"}),
+    "set": frozenset({"list", "reversed", "set", "sorted", "tuple"}),
+    "sorted": frozenset({"list", "reversed", "sorted", "tuple"}),
+    "tuple": frozenset({"list", "tuple"}),
+}
+
+
+def sorted_reverse_flag(call: ast.Call) -> bool | None:
+    """
+    The value of the reverse argument to a sorted() call, or None if it is not
+    a constant.
+    """
+    reverse_flag_value: bool | None = False
+    for keyword in call.keywords:
+        if keyword.arg != "reverse":
+            continue
+        if isinstance(keyword.value, ast.Constant):
+            reverse_flag_value = bool(keyword.value.value)
+        else:
+            # Complex value
+            reverse_flag_value = None
+    return reverse_flag_value
+
+
+def fuse_call_chain(node: ast.Call) -> tuple[list[ast.Call], str]:
+    """
+    Simplify a chain of nested builtin calls, like list(sorted(list(x))), by
+    applying C413 and C414 repeatedly from the outside in. Returns the calls
+    removed or replaced along the way, and the simplified code.
+    """
+    assert isinstance(node.func, ast.Name)
+    outer = node.func.id
+    extra_args = node.args[1:]
+    keywords = node.keywords
+    arg = node.args[0]
+    fused: list[ast.Call] = []
+    while (
+        isinstance(arg, ast.Call)
+        and isinstance(arg.func, ast.Name)
+        and len(arg.args) > 0
+        and not isinstance(arg.args[0], ast.Starred)
+    ):
+        inner = arg.func.id
+        if inner in unnecessary_inner_calls.get(outer, ()):
+            pass
+        elif outer == "list" and inner == "sorted":
+            outer = inner
+            extra_args = arg.args[1:]
+            keywords = arg.keywords
+        elif outer == "reversed" and inner == "sorted":
+            reverse_flag_value = sorted_reverse_flag(arg)
+            if reverse_flag_value is None:
+                break
+            outer = inner
+            extra_args = arg.args[1:]
+            keywords = [k for k in arg.keywords if k.arg != "reverse"]
+            if not reverse_flag_value:
+                keywords.append(ast.keyword("reverse", ast.Constant(True)))
+        else:
+            break
+        fused.append(arg)
+        arg = arg.args[0]
+
+    simplified = ast.unparse(ast.Call(ast.Name(outer), [arg, *extra_args], keywords))
+    if isinstance(arg, ast.GeneratorExp) and not extra_args and not keywords:
+        # A generator expression as the sole argument needs no extra brackets.
+        simplified = simplified.replace("((", "(", 1)[:-1]
+    return fused, simplified
+
+
+def awaits_call(node: ast.expr) -> bool:
+    return isinstance(node, ast.Await) and isinstance(node.value, ast.Call)
+
+
+def awaits_independently(node: ast.expr) -> bool:
+    """
+    Whether an expression awaits exactly one call, and cannot carry state
+    from one iteration of a loop to the next through an assignment expression.
+    """
+    awaits = 0
+    for child in ast.walk(node):
+        if isinstance(child, ast.NamedExpr):
+            return False
+        elif isinstance(child, ast.Await):
+            awaits += 1
+    return awaits == 1
+
+
+def awaits_sequentially(node: ast.DictComp | ast.ListComp | ast.SetComp) -> bool:
+    """
+    Whether a comprehension awaits a call for each item, one at a time, as in
+    ``[await fetch(x) for x in ids]``, including over async iterables.
+    """
+    element = node.value if isinstance(node, ast.DictComp) else node.elt
+    return awaits_call(element) and awaits_independently(node)
+
+
+def appends_awaited(node: ast.AsyncFor | ast.For) -> bool:
+    """
+    Whether a for or async for loop only appends the result of awaiting a
+    call for each item, as in ``for x in ids: results.append(await fetch(x))``,
+    where the call does not use the results so far.
+    """
+    if node.orelse or len(node.body) != 1:
+        return False
+    statement = node.body[0]
+    if not (
+        isinstance(statement, ast.Expr)
+        and isinstance(statement.value, ast.Call)
+        and isinstance(statement.value.func, ast.Attribute)
+        and statement.value.func.attr == "append"
+        and isinstance(statement.value.func.value, ast.Name)
+        and len(statement.value.args) == 1
+        and not statement.value.keywords
+        and awaits_call(statement.value.args[0])
+    ):
+        return False
+    results_name = statement.value.func.value.id
+    awaited = statement.value.args[0]
+    return awaits_independently(awaited) and not any(
+        isinstance(child, ast.Name) and child.id == results_name
+        for child in ast.walk(awaited)
+    )
+
+
+# Names of functions and methods other than builtins that rules apply to,
+# called as either name() or obj.name().
+other_call_names = frozenset({"merge", "nlargest", "nsmallest", "reduce", "sort"})
+
+
+def sum_start(node: ast.Call) -> ast.expr | None:
+    """
+    The start value passed to sum(), positionally or by keyword.
+    """
+    if len(node.args) == 2:
+        return node.args[1]
+    for keyword in node.keywords:
+        if keyword.arg == "start":
+            return keyword.value
+    return None
+
+
+def concatenates(func: ast.expr) -> bool:
+    """
+    Whether a function passed to reduce() adds its two arguments, as
+    ``operator.add``, ``operator.concat``, or ``lambda a, b: a + b`` do.
+    """
+    if isinstance(func, ast.Attribute):
+        return (
+            isinstance(func.value, ast.Name)
+            and func.value.id == "operator"
+            and func.attr in ("add", "concat")
+        )
+    return (
+        isinstance(func, ast.Lambda)
+        and len(func.args.args) == 2
+        and not func.args.posonlyargs
+        and func.args.vararg is None
+        and not func.args.kwonlyargs
+        and func.args.kwarg is None
+        and isinstance(func.body, ast.BinOp)
+        and isinstance(func.body.op, ast.Add)
+        and isinstance(func.body.left, ast.Name)
+        and func.body.left.id == func.args.args[0].arg
+        and isinstance(func.body.right, ast.Name)
+        and func.body.right.id == func.args.args[1].arg
+    )
+
+
+# Loops and comprehensions, whose bodies run once per item.
+loop_node_types = frozenset(
+    {
+        ast.AsyncFor,
+        ast.DictComp,
+        ast.For,
+        ast.GeneratorExp,
+        ast.ListComp,
+        ast.SetComp,
+        ast.While,
+    }
+)
+
+# Nodes whose bodies are not run by the loop they are in each time around,
+# or that are loops checked in their own right.
+loop_boundary_types = loop_node_types | {
+    ast.AsyncFunctionDef,
+    ast.ClassDef,
+    ast.FunctionDef,
+    ast.Lambda,
+}
+
+# List methods that take O(n) time, so are quadratic when called per item.
+quadratic_methods = frozenset({"count", "index", "insert", "pop", "remove"})
+
+
+def getter_rewrite(func: ast.expr) -> str | None:
+    """
+    The operator.itemgetter() or attrgetter() call equivalent to a lambda
+    that returns a constant item, or an attribute, of its only parameter.
+    """
+    if not isinstance(func, ast.Lambda):
+        return None
+    args = func.args
+    params = args.posonlyargs + args.args
+    if len(params) != 1 or args.vararg or args.kwonlyargs or args.kwarg:
+        return None
+    param = params[0].arg
+    body = func.body
+    if isinstance(body, ast.Subscript):
+        index = body.slice
+        if isinstance(index, ast.UnaryOp) and isinstance(index.op, ast.USub):
+            index = index.operand
+        if (
+            isinstance(body.value, ast.Name)
+            and body.value.id == param
+            and isinstance(index, ast.Constant)
+        ):
+            return f"itemgetter({ast.unparse(body.slice)})"
+        return None
+    attrs = []
+    while isinstance(body, ast.Attribute):
+        attrs.append(body.attr)
+        body = body.value
+    if attrs and isinstance(body, ast.Name) and body.id == param:
+        return f"attrgetter({'.'.join(reversed(attrs))!r})"
+    return None
+
+
+# Builtins that consume an iterable, for C434. Generators passed to list(),
+# set(), and dict() are reported by C400-C402 instead.
+identity_consumers = frozenset(
+    {"all", "any", "frozenset", "max", "min", "sorted", "sum", "tuple"}
+)
+
+
+def is_identity_comprehension(
+    node: ast.DictComp | ast.GeneratorExp | ast.ListComp | ast.SetComp,
+) -> bool:
+    """
+    Whether a comprehension yields the items of its only generator unchanged,
+    as in [x for x in y], or {k: v for k, v in y} for a dict.
+    """
+    if len(node.generators) != 1:
+        return False
+    (comprehension,) = node.generators
+    if comprehension.ifs or comprehension.is_async:
+        return False
+    target = comprehension.target
+    if isinstance(node, ast.DictComp):
+        return (
+            isinstance(node.key, ast.Name)
+            and isinstance(node.value, ast.Name)
+            and isinstance(target, ast.Tuple)
+            and len(target.elts) == 2
+            and is_name(target.elts[0], node.key.id)
+            and is_name(target.elts[1], node.value.id)
+        )
+    return isinstance(node.elt, ast.Name) and is_name(target, node.elt.id)
+
+
+def calls_per_item(
+    node: ast.expr,
+) -> TypeGuard[ast.DictComp | ast.ListComp | ast.SetComp]:
+    """
+    Whether a node is a comprehension whose items are the results of calls,
+    so it is evaluated for the calls' side effects when used as a statement.
+    """
+    if isinstance(node, ast.DictComp):
+        items = [node.key, node.value]
+    elif isinstance(node, (ast.ListComp, ast.SetComp)):
+        items = [node.elt]
+    else:
+        return False
+    return any(isinstance(item, (ast.Await, ast.Call)) for item in items)
+
+
+def membership_rewrite(
+    func_name: str, node: ast.GeneratorExp
+) -> tuple[str, str] | None:
+    """
+    The message key and code for a membership test (C431), or set method call
+    (C432), equivalent to any() or all() of a generator comparing each item
+    to the same value or container.
+    """
+    if len(node.generators) != 1:
+        return None
+    (comprehension,) = node.generators
+    if (
+        comprehension.ifs
+        or comprehension.is_async
+        or not isinstance(comprehension.target, ast.Name)
+        or not isinstance(node.elt, ast.Compare)
+        or len(node.elt.ops) != 1
+    ):
+        return None
+    target = comprehension.target.id
+    (op,) = node.elt.ops
+    item, other = node.elt.left, node.elt.comparators[0]
+    if isinstance(op, (ast.Eq, ast.NotEq)) and is_name(other, target):
+        item, other = other, item
+    if not is_name(item, target) or not is_loop_invariant(other, target):
+        return None
+
+    iterable = comprehension.iter
+    rewrite: ast.expr
+    if func_name == "any" and isinstance(op, ast.Eq):
+        msg_key = "C431"
+        rewrite = ast.Compare(other, [ast.In()], [iterable])
+    elif func_name == "all" and isinstance(op, ast.NotEq):
+        msg_key = "C431"
+        rewrite = ast.Compare(other, [ast.NotIn()], [iterable])
+    elif isinstance(op, (ast.In, ast.NotIn)):
+        # Off by default, since the items must be hashable, and "in" on a
+        # string container matches substrings rather than items.
+        msg_key = "C432"
+        method = (
+            "issubset"
+            if (func_name == "all") == isinstance(op, ast.In)
+            else "isdisjoint"
+        )
+        set_call = ast.Call(ast.Name("set"), [iterable], [])
+        rewrite = ast.Call(ast.Attribute(set_call, method), [other], [])
+        if func_name == "any":
+            rewrite = ast.UnaryOp(ast.Not(), rewrite)
+    else:
+        return None
+    return msg_key, ast.unparse(rewrite)
+
+
+def is_name(node: ast.AST, name: str) -> bool:
+    return isinstance(node, ast.Name) and node.id == name
+
+
+def is_loop_invariant(node: ast.expr, target: str) -> bool:
+    """
+    Whether an expression is a plain value that doesn't depend on the loop
+    target, so evaluating it once is the same as evaluating it per item.
+    """
+    return is_plain_value(node) and not any(
+        is_name(child, target) for child in ast.walk(node)
+    )
+
+
+def is_plain_value(node: ast.expr) -> bool:
+    """
+    Whether an expression is a constant, or a name or attribute lookup,
+    possibly negated.
+    """
+    if isinstance(node, ast.UnaryOp):
+        node = node.operand
+    while isinstance(node, ast.Attribute):
+        node = node.value
+    return isinstance(node, (ast.Constant, ast.Name))
+
+
+def is_cheap_default(node: ast.expr) -> bool:
+    """
+    Whether an expression is a plain value or an empty collection, and so can
+    be evaluated as a default even when it isn't used.
+    """
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return not node.elts
+    elif isinstance(node, ast.Dict):
+        return not node.keys
+    elif isinstance(node, ast.Call):
+        return (
+            isinstance(node.func, ast.Name)
+            and node.func.id in ("dict", "list", "set")
+            and not node.args
+            and not node.keywords
+        )
+    return is_plain_value(node)
+
+
+def double_lookup(node: ast.If | ast.IfExp) -> tuple[str, ast.expr] | None:
+    """
+    The message key and container for a membership test of a key that is
+    then looked up again, as in "if k not in d: d[k] = []" (C435), or
+    "v = d[k] if k in d else None" (C436).
+    """
+    test = node.test
+    if (
+        not isinstance(test, ast.Compare)
+        or len(test.ops) != 1
+        or not isinstance(test.ops[0], (ast.In, ast.NotIn))
+        or not is_plain_value(test.left)
+        or not is_plain_value(test.comparators[0])
+        # Mapping classes implement get() and setdefault() this way.
+        or is_name(test.comparators[0], "self")
+    ):
+        return None
+    key, container = test.left, test.comparators[0]
+    found = isinstance(test.ops[0], ast.In)
+
+    def is_item(item: ast.AST) -> bool:
+        return (
+            isinstance(item, ast.Subscript)
+            and ast.dump(item.value) == ast.dump(container)
+            and ast.dump(item.slice) == ast.dump(key)
+        )
+
+    if isinstance(node, ast.IfExp):
+        # d[k] if k in d else default, or default if k not in d else d[k]
+        item, default = (node.body, node.orelse) if found else (node.orelse, node.body)
+        if is_item(item) and is_cheap_default(default):
+            return "C436", container
+        return None
+
+    assign = node.body[0] if len(node.body) == 1 else None
+    if not isinstance(assign, ast.Assign) or len(assign.targets) != 1:
+        return None
+    (target,) = assign.targets
+    if not found:
+        # if k not in d: d[k] = default
+        if not node.orelse and is_item(target) and is_cheap_default(assign.value):
+            return "C435", container
+    elif (
+        # if k in d: v = d[k] else: v = default. Without the else branch, v
+        # is left as it was when k is missing, which get() can't do alone.
+        is_item(assign.value)
+        and not is_item(target)
+        and len(node.orelse) == 1
+        and isinstance(other := node.orelse[0], ast.Assign)
+        and len(other.targets) == 1
+        and ast.dump(other.targets[0]) == ast.dump(target)
+        and is_cheap_default(other.value)
+    ):
+        return "C436", container
+    return None
+
+
+def loop_iterables(node: ast.AST) -> list[ast.expr]:
+    """
+    The iterables of a loop or comprehension, as ``xs`` in ``for x in xs``.
+    """
+    if isinstance(node, (ast.For, ast.AsyncFor)):
+        return [node.iter]
+    elif isinstance(node, (ast.DictComp, ast.GeneratorExp, ast.ListComp, ast.SetComp)):
+        return [generator.iter for generator in node.generators]
+    return []
+
+
+def iterated_names(node: ast.AST) -> set[str]:
+    """
+    The names a loop or comprehension iterates over, as in ``for x in xs``.
+    """
+    return {it.id for it in loop_iterables(node) if isinstance(it, ast.Name)}
+
+
+def is_call_to(
+    node: ast.AST | None, func_name: str, num_args: int
+) -> TypeGuard[ast.Call]:
+    """
+    Whether a node calls a name with some positional arguments, and nothing
+    else.
+    """
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id == func_name
+        and len(node.args) == num_args
+        and not node.keywords
+        and not has_star_args(node)
+    )
+
+
+def is_list_of_range(node: ast.AST | None) -> TypeGuard[ast.Call]:
+    """
+    Whether a node is a call like ``list(range(n))``.
+    """
+    return is_call_to(node, "list", 1) and any(
+        is_call_to(node.args[0], "range", num_args) for num_args in (1, 2, 3)
+    )
+
+
+def range_len_indexing(
+    node: ast.DictComp | ast.GeneratorExp | ast.ListComp | ast.SetComp,
+) -> tuple[ast.expr, str, bool] | None:
+    """
+    For a comprehension that iterates over indexes only to index a sequence,
+    as in ``[xs[i] for i in range(len(xs))]``, return its range() call, the
+    sequence's name, and whether the index is also used on its own.
+    """
+    if len(node.generators) != 1:
+        return None
+    generator = node.generators[0]
+    iterable = generator.iter
+    if (
+        generator.is_async
+        or not isinstance(generator.target, ast.Name)
+        or not is_call_to(iterable, "range", 1)
+    ):
+        return None
+    length = iterable.args[0]
+    if not is_call_to(length, "len", 1) or not isinstance(length.args[0], ast.Name):
+        return None
+    index = generator.target.id
+    sequence = length.args[0].id
+
+    if isinstance(node, ast.DictComp):
+        parts = [node.key, node.value, *generator.ifs]
+    else:
+        parts = [node.elt, *generator.ifs]
+    uses = lookups = 0
+    for part in parts:
+        for child in ast.walk(part):
+            if isinstance(child, ast.Name) and child.id == index:
+                uses += 1
+            elif (
+                isinstance(child, ast.Subscript)
+                and isinstance(child.value, ast.Name)
+                and child.value.id == sequence
+                and isinstance(child.slice, ast.Name)
+                and child.slice.id == index
+                and isinstance(child.ctx, ast.Load)
+            ):
+                lookups += 1
+    if lookups == 0:
+        return None
+    return iterable, sequence, uses > lookups
+
+
+def per_iteration_method_calls(
+    node: ast.AST,
+) -> Generator[tuple[ast.Call, str, str]]:
+    """
+    Yield each call to one of quadratic_methods on a name that a loop or
+    comprehension makes for every item, with the method and the name. Nested
+    loops and comprehensions are not looked into, since they are checked in
+    their own right.
+    """
+    todo: list[ast.AST] = []
+    if isinstance(node, (ast.For, ast.AsyncFor)):
+        todo.extend(node.body)
+    elif isinstance(node, ast.While):
+        todo.append(node.test)
+        todo.extend(node.body)
+    elif isinstance(node, (ast.DictComp, ast.GeneratorExp, ast.ListComp, ast.SetComp)):
+        if isinstance(node, ast.DictComp):
+            todo.extend((node.key, node.value))
+        else:
+            todo.append(node.elt)
+        for i, generator in enumerate(node.generators):
+            if i > 0:
+                todo.append(generator.iter)
+            todo.extend(generator.ifs)
+
+    while todo:
+        child = todo.pop()
+        if type(child) in loop_boundary_types:
+            continue
+        if (
+            isinstance(child, ast.Call)
+            and isinstance(child.func, ast.Attribute)
+            and child.func.attr in quadratic_methods
+            and isinstance(child.func.value, ast.Name)
+        ):
+            yield child, child.func.attr, child.func.value.id
+        todo.extend(ast.iter_child_nodes(child))
+
+
+# Nodes that rules apply to.
+checked_node_types = loop_node_types | {ast.Call, ast.Expr, ast.If, ast.IfExp}
+
 comp_type = {
     ast.DictComp: "dict",
     ast.ListComp: "list",
     ast.SetComp: "set",
 }
+
+
+# Builtins that the rules rely on, and so need to be tracked for rebinding.
+builtin_names = frozenset(
+    {
+        "all",
+        "any",
+        "dict",
+        "frozenset",
+        "len",
+        "list",
+        "map",
+        "max",
+        "min",
+        "reversed",
+        "set",
+        "sorted",
+        "sum",
+        "tuple",
+    }
+)
+
+# Also tracked are builtins that rules look for only within other calls or
+# loops, so need not be dispatched on.
+tracked_names = builtin_names | {"range"}
+
+
+class BuiltinCall:
+    """
+    A call to a builtin being checked by the rules in builtin_call_patterns.
+    """
+
+    __slots__ = ("node", "func_name", "inner_func", "scope", "visited_map_calls")
+
+    def __init__(
+        self,
+        node: ast.Call,
+        func_name: str,
+        inner_func: str | None,
+        scope: Scope,
+        visited_map_calls: set[ast.Call],
+    ) -> None:
+        self.node = node
+        self.func_name = func_name
+        # The name called in the first argument, as in list(tuple(x)).
+        self.inner_func = inner_func
+        self.scope = scope
+        # The map() calls reported by C417 on the call around them.
+        self.visited_map_calls = visited_map_calls
+
+    def result(
+        self, checker: ComprehensionChecker, message: str
+    ) -> tuple[int, int, str, type[Any]]:
+        return (self.node.lineno, self.node.col_offset, message, type(checker))
+
+
+# Patterns for the rules for calls to builtins, in the order they are tried:
+# the first rule that matches a call reports it. Each lists the builtins whose
+# calls it checks, or None for any, the node types its first positional
+# argument can have, with NoneType for calls without one, or None for any,
+# and the number of positional arguments it needs, or None for any.
+if TYPE_CHECKING:
+    CallRule = Callable[
+        [ComprehensionChecker, BuiltinCall, Any],
+        list[tuple[int, int, str, type[Any]]] | None,
+    ]
+builtin_call_patterns: list[
+    tuple[Collection[str] | None, tuple[type[Any], ...] | None, int | None, CallRule]
+] = [
+    # C400, C401
+    (
+        ("list", "set"),
+        (ast.GeneratorExp,),
+        1,
+        ComprehensionChecker._check_generator_call,
+    ),
+    # C402, C404
+    (
+        ("dict",),
+        (ast.GeneratorExp, ast.ListComp),
+        1,
+        ComprehensionChecker._check_dict_of_pairs,
+    ),
+    # C403, C411, C419
+    (
+        ("list", "set", "any", "all"),
+        (ast.ListComp,),
+        1,
+        ComprehensionChecker._check_list_comprehension_call,
+    ),
+    # C429
+    (("len",), (ast.Call,), None, ComprehensionChecker._check_len_of_list),
+    # C431, C432
+    (
+        ("any", "all"),
+        (ast.GeneratorExp,),
+        1,
+        ComprehensionChecker._check_membership_test,
+    ),
+    # C434
+    (
+        identity_consumers,
+        (ast.GeneratorExp,),
+        1,
+        ComprehensionChecker._check_identity_generator,
+    ),
+    # C427
+    (("sum",), None, None, ComprehensionChecker._check_sum_of_sequences),
+    # C423
+    (None, (ast.ListComp,), 1, ComprehensionChecker._check_reducer_comprehension),
+    # C409, C410
+    (
+        ("tuple", "list"),
+        (ast.Tuple, ast.List),
+        1,
+        ComprehensionChecker._check_literal_in_same_call,
+    ),
+    # C418
+    (
+        ("dict",),
+        (ast.Dict, ast.DictComp),
+        1,
+        ComprehensionChecker._check_dict_in_dict,
+    ),
+    # C405, C406, C409, C410
+    (
+        ("tuple", "list", "set", "dict"),
+        (ast.Tuple, ast.List),
+        1,
+        ComprehensionChecker._check_literal_call,
+    ),
+    # C408
+    (
+        ("dict", "tuple", "list"),
+        (type(None),),
+        None,
+        ComprehensionChecker._check_empty_call,
+    ),
+    # C413
+    (
+        ("list", "reversed"),
+        (ast.Call,),
+        None,
+        ComprehensionChecker._check_sorted_in_call,
+    ),
+    # C414
+    (
+        unnecessary_inner_calls,
+        (ast.Call,),
+        None,
+        ComprehensionChecker._check_inner_call,
+    ),
+    # C415
+    (
+        ("reversed", "set", "sorted"),
+        (ast.Subscript,),
+        None,
+        ComprehensionChecker._check_reversed_subscript,
+    ),
+    # C417
+    (("map",), (ast.Lambda,), 2, ComprehensionChecker._check_map_call),
+    # C417, C430
+    (
+        ("list", "set", "dict"),
+        (ast.Call,),
+        1,
+        ComprehensionChecker._check_map_in_call,
+    ),
+    # C421
+    (
+        ("dict", "list", "set", "tuple"),
+        (ast.Name,),
+        1,
+        ComprehensionChecker._check_annotated_call,
+    ),
+]
+
+# Patterns need no more positional arguments than this. Calls with more are
+# looked up as having this many, and match only patterns for any number.
+max_arity = 3
+
+
+def compile_call_rules(
+    callee: str | None,
+) -> dict[tuple[type[Any], int], tuple[CallRule, ...]]:
+    """
+    The rules to try for calls to a builtin, or to any other name for None,
+    by the type of the call's first positional argument and the number of
+    positional arguments. Argument types no pattern names use the rules
+    under ast.expr, which are those for any type.
+    """
+    arg_types: set[type[Any]] = {ast.expr, type(None)}
+    for _, types, _, _ in builtin_call_patterns:
+        arg_types.update(types or ())
+    return {
+        (arg_type, arity): tuple(
+            rule
+            for callees, types, rule_arity, rule in builtin_call_patterns
+            if (callees is None or callee in callees)
+            and (types is None or arg_type in types)
+            and (rule_arity is None or rule_arity == arity)
+        )
+        for arg_type in arg_types
+        for arity in range(max_arity + 1)
+    }
+
+
+# The compiled table, so each call only runs the rules that can match it.
+builtin_call_rules = {name: compile_call_rules(name) for name in builtin_names}
+any_callee_rules = compile_call_rules(None)
+
+
+# Annotations that name a builtin collection, mapped to that builtin.
+annotation_types = {
+    "Dict": "dict",
+    "List": "list",
+    "Set": "set",
+    "Tuple": "tuple",
+    "dict": "dict",
+    "list": "list",
+    "set": "set",
+    "tuple": "tuple",
+}
+
+
+def annotation_type(annotation: ast.expr) -> str | None:
+    if isinstance(annotation, ast.Subscript):
+        annotation = annotation.value
+    if isinstance(annotation, ast.Name):
+        return annotation_types.get(annotation.id)
+    elif (
+        isinstance(annotation, ast.Attribute)
+        and isinstance(annotation.value, ast.Name)
+        and annotation.value.id == "typing"
+    ):
+        return annotation_types.get(annotation.attr)
+    return None
+
+
+class Scope:
+    """
+    The names bound within a module, class, function, or comprehension body.
+    Tracks which builtins the rules rely on have been rebound, and which names
+    have been annotated as builtin collections.
+    """
+
+    __slots__ = ("parent", "kind", "bound", "annotations")
+
+    def __init__(self, parent: Scope | None, kind: str) -> None:
+        self.parent = parent
+        self.kind = kind
+        self.bound: set[str] = set()
+        self.annotations: dict[str, str | None] = {}
+
+    def bind(self, name: str, annotation: ast.expr | None = None) -> None:
+        if name in tracked_names:
+            self.bound.add(name)
+        if annotation is not None:
+            self.annotations[name] = annotation_type(annotation)
+        else:
+            self.annotations.setdefault(name, None)
+
+    def is_shadowed(self, name: str) -> bool:
+        scope: Scope | None = self
+        while scope is not None:
+            if name in scope.bound:
+                return True
+            scope = scope.parent
+            # Class bodies are not visible from the scopes nested within them.
+            while scope is not None and scope.kind == "class":
+                scope = scope.parent
+        return False
+
+    def annotated_type(self, name: str) -> str | None:
+        """
+        The builtin collection a name is annotated as in this scope, looking
+        through comprehensions to the function or module they are in.
+        """
+        scope = self
+        while name not in scope.annotations:
+            if scope.kind != "comprehension" or scope.parent is None:
+                return None
+            scope = scope.parent
+        return scope.annotations[name]
+
+
+# Nodes that start a new scope.
+scope_node_types = frozenset(
+    {
+        ast.AsyncFunctionDef,
+        ast.ClassDef,
+        ast.DictComp,
+        ast.FunctionDef,
+        ast.GeneratorExp,
+        ast.Lambda,
+        ast.ListComp,
+        ast.SetComp,
+    }
+)
+
+# Nodes other than names that bind names in their scope.
+binding_node_types = frozenset(
+    {
+        ast.AnnAssign,
+        ast.ExceptHandler,
+        ast.Global,
+        ast.Import,
+        ast.ImportFrom,
+        ast.MatchAs,
+        ast.MatchMapping,
+        ast.MatchStar,
+        ast.arg,
+    }
+)
+
+
+def walk_scopes(tree: ast.AST, module_scope: Scope) -> Generator[tuple[ast.AST, Scope]]:
+    """
+    Yield each node in the tree with the scope it is evaluated in, recording
+    names bound in those scopes along the way.
+    """
+    # The stack holds nodes, and the scopes to switch to before the nodes
+    # above them, so that only nodes that start a scope cost more than in
+    # ast.walk().
+    todo: list[Any] = [tree]
+    scope = module_scope
+    while todo:
+        node = todo.pop()
+        # Dispatch on the exact node type, as most nodes neither bind names nor
+        # start a scope, and a set lookup is cheaper than isinstance() checks.
+        node_type = type(node)
+        if node_type is Scope:
+            scope = node
+            continue
+        yield node, scope
+
+        if node_type is ast.Name:
+            if type(node.ctx) is not ast.Load:
+                scope.bind(node.id)
+            continue
+
+        if node_type not in scope_node_types:
+            if node_type in binding_node_types:
+                bind_names(node, scope, module_scope)
+            # Reversed so that nodes come off the stack in source order.
+            todo.extend(reversed(list(ast.iter_child_nodes(node))))
+            continue
+
+        # Runs of children evaluated in the same scope, in source order.
+        runs: list[tuple[Scope, list[ast.AST]]]
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            inner = Scope(scope, "function")
+            defaults: list[ast.AST] = [*node.args.defaults]
+            defaults.extend(d for d in node.args.kw_defaults if d)
+            params: list[ast.AST] = [
+                a
+                for a in (
+                    *node.args.posonlyargs,
+                    *node.args.args,
+                    node.args.vararg,
+                    *node.args.kwonlyargs,
+                    node.args.kwarg,
+                )
+                if a is not None
+            ]
+            if isinstance(node, ast.Lambda):
+                runs = [(scope, defaults), (inner, [*params, node.body])]
+            else:
+                scope.bind(node.name)
+                outer: list[ast.AST] = [*node.decorator_list]
+                if node.returns is not None:
+                    outer.append(node.returns)
+                runs = [
+                    (scope, defaults),
+                    (inner, params),
+                    (scope, outer),
+                    (inner, [*node.body]),
+                ]
+        elif isinstance(node, ast.ClassDef):
+            scope.bind(node.name)
+            inner = Scope(scope, "class")
+            runs = [
+                (scope, [*node.decorator_list, *node.bases, *node.keywords]),
+                (inner, [*node.body]),
+            ]
+        else:
+            assert isinstance(
+                node, (ast.DictComp, ast.GeneratorExp, ast.ListComp, ast.SetComp)
+            )
+            # Only the first iterable is evaluated in the enclosing scope.
+            inner = Scope(scope, "comprehension")
+            within: list[ast.AST] = []
+            for i, generator in enumerate(node.generators):
+                within.append(generator.target)
+                if i > 0:
+                    within.append(generator.iter)
+                within.extend(generator.ifs)
+            if isinstance(node, ast.DictComp):
+                within.extend((node.key, node.value))
+            else:
+                within.append(node.elt)
+            runs = [(scope, [node.generators[0].iter]), (inner, within)]
+
+        # Return to this scope once the children are done, then push each run
+        # with its scope on top, in reverse so they come off in source order.
+        todo.append(scope)
+        for run_scope, run in reversed(runs):
+            todo.extend(reversed(run))
+            todo.append(run_scope)
+
+
+def bind_names(node: ast.AST, scope: Scope, module_scope: Scope) -> None:
+    """
+    Record the names bound by a node other than a name, such as an import.
+    """
+    if isinstance(node, ast.arg):
+        scope.bind(node.arg, node.annotation)
+    elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+        scope.bind(node.target.id, node.annotation)
+    elif isinstance(node, (ast.Import, ast.ImportFrom)):
+        for alias in node.names:
+            scope.bind(alias.asname or alias.name.partition(".")[0])
+    elif isinstance(node, ast.Global):
+        for name in node.names:
+            module_scope.bind(name)
+    elif isinstance(node, (ast.ExceptHandler, ast.MatchAs, ast.MatchStar)):
+        if node.name is not None:
+            scope.bind(node.name)
+    elif isinstance(node, ast.MatchMapping) and node.rest is not None:
+        scope.bind(node.rest)
+
+
+# A result from a checker, the builtins it relies on, the scope it is in, and
+# the results to report instead if any of those builtins is rebound.
+if TYPE_CHECKING:
+    PendingResult = tuple[
+        tuple[int, int, str, type[Any]],
+        tuple[str, ...],
+        Scope,
+        tuple["PendingResult", ...],
+    ]
+
+
+def called_builtins(node: ast.AST) -> tuple[str, ...]:
+    """
+    The builtin names called by a call, and by any calls nested in its first
+    argument, which rules like C414 look into.
+    """
+    names: list[str] = []
+    while isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        if node.func.id in tracked_names:
+            names.append(node.func.id)
+        if len(node.args) == 0:
+            break
+        node = node.args[0]
+    return tuple(names)
+
+
+def relied_on_builtins(
+    node: ast.AST, result: tuple[int, int, str, type[Any]]
+) -> tuple[str, ...]:
+    """
+    The builtins that a result on a node relies on, so that it is not
+    reported if any of them is rebound. Stored instead of the node, so
+    pending results do not keep syntax trees alive.
+    """
+    code = result[2][:4]
+    if type(node) in loop_node_types:
+        # Only C428 and C429 look into a loop's iterables, for range() calls,
+        # and report on the iterable itself.
+        if code not in ("C428", "C429"):
+            return ()
+        for iterable in loop_iterables(node):
+            if (iterable.lineno, iterable.col_offset) == result[:2]:
+                return called_builtins(iterable)
+        return ()
+    if not (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in tracked_names
+    ):
+        return ()
+    names = called_builtins(node)
+    if code == "C429":
+        # As in len(list(range(n))).
+        return names[:3]
+    if code in ("C413", "C414") or (
+        code in ("C417", "C430") and names[0] in ("dict", "list", "set")
+    ):
+        # Rules that look into the call in the first argument, as in
+        # list(sorted(x)) or list(map(lambda x: x.a, y)).
+        return names[:2]
+    return names[:1]
+
+
+def resolve_pending(
+    pending: Iterable[PendingResult], bound: Collection[str] = ()
+) -> Generator[tuple[int, int, str, type[Any]]]:
+    """
+    Yield pending results, except those relying on a builtin that has been
+    rebound, such as by ``list = MyList`` or ``from numpy import sum``, or
+    whose name is in bound. Those are replaced by their fallback results.
+    """
+    for result, names, scope, fallback in pending:
+        if not any(name in bound or scope.is_shadowed(name) for name in names):
+            yield result
+        elif fallback:
+            yield from resolve_pending(fallback, bound)
@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+from flake8_comprehensions._main import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import tarfile
+import zipfile
+from collections.abc import Generator
+
+archive_suffixes = (".whl", ".zip", ".tar", ".tar.gz", ".tgz")
+
+# Errors from reading a corrupt or unsupported archive.
+archive_errors = (tarfile.TarError, zipfile.BadZipFile)
+
+
+def read_archive(path: str) -> Generator[tuple[str, bytes]]:
+    """
+    Yield the name and contents of each Python file in a wheel, zip, or tar
+    archive, read straight from the archive without extracting it to disk.
+    Names take the form archive!member.
+    """
+    if path.endswith((".whl", ".zip")):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and info.filename.endswith(".py"):
+                    yield f"{path}!{info.filename}", zf.read(info)
+    else:
+        # Stream mode reads members in order, without seeking back.
+        with tarfile.open(path, "r|*") as tf:
+            for member in tf:
+                if member.isfile() and member.name.endswith(".py"):
+                    fp = tf.extractfile(member)
+                    assert fp is not None
+                    yield f"{path}!{member.name}", fp.read()
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from collections.abc import Iterable
+
+# Representative code for each rule, before and after following its advice.
+# Each runs against ``items``, a list of integers of the configured size, with
+# Counter and deque imported from collections, and attrgetter from operator.
+rewrites: dict[str, tuple[str, str]] = {
+    "C400": ("list(x for x in items)", "[x for x in items]"),
+    "C401": ("set(x for x in items)", "{x for x in items}"),
+    "C402": ("dict((x, x) for x in items)", "{x: x for x in items}"),
+    "C403": ("set([x + 1 for x in items])", "{x + 1 for x in items}"),
+    "C404": ("dict([(x, x) for x in items])", "{x: x for x in items}"),
+    "C405": ("set([1, 2, 3])", "{1, 2, 3}"),
+    "C406": ("dict([(1, 2), (3, 4)])", "{1: 2, 3: 4}"),
+    "C408": ("dict(a=1, b=2)", "{'a': 1, 'b': 2}"),
+    "C409": ("tuple([1, 2, 3])", "(1, 2, 3)"),
+    "C410": ("list([1, 2, 3])", "[1, 2, 3]"),
+    "C411": ("list([x + 1 for x in items])", "[x + 1 for x in items]"),
+    "C413": ("list(sorted(items))", "sorted(items)"),
+    "C414": ("sorted(list(items))", "sorted(items)"),
+    "C415": ("set(items[::-1])", "set(items)"),
+    "C416": ("[x for x in items]", "list(items)"),
+    "C417": ("list(map(lambda x: x + 1, items))", "[x + 1 for x in items]"),
+    "C418": ("dict({'a': 1})", "{'a': 1}"),
+    "C419": ("any([x < 0 for x in items])", "any(x < 0 for x in items)"),
+    "C420": ("{x: None for x in items}", "dict.fromkeys(items)"),
+    "C421": ("list(items)", "items"),
+    "C423": ("sum([x + 1 for x in items])", "sum(x + 1 for x in items)"),
+    "C424": (
+        "[items.count(x) for x in items]",
+        "counts = Counter(items); [counts[x] for x in items]",
+    ),
+    "C425": (
+        "[items.index(x) for x in items]",
+        "positions = {x: i for i, x in enumerate(items)}; [positions[x] for x in items]",
+    ),
+    "C426": (
+        "q = items.copy()\nwhile q: q.pop(0)",
+        "q = deque(items)\nwhile q: q.popleft()",
+    ),
+    "C427": (
+        "sum([[x] for x in items], [])",
+        "[y for x in [[x] for x in items] for y in x]",
+    ),
+    "C428": ("[items[i] * 2 for i in range(len(items))]", "[x * 2 for x in items]"),
+    "C429": (
+        "for i in list(range(len(items))): pass",
+        "for i in range(len(items)): pass",
+    ),
+    "C430": (
+        "sorted(items, key=lambda x: x.real)",
+        "sorted(items, key=attrgetter('real'))",
+    ),
+    "C431": ("any(x == -1 for x in items)", "-1 in items"),
+    "C432": (
+        "all(x in items for x in items)",
+        "set(items).issubset(items)",
+    ),
+    "C433": ("[abs(x) for x in items]", "for x in items: abs(x)"),
+    "C434": ("sum(x for x in items)", "sum(items)"),
+    "C435": (
+        "d = {}\nfor x in items:\n    if x not in d:\n        d[x] = []\n"
+        + "    d[x].append(x)",
+        "d = {}\nfor x in items:\n    d.setdefault(x, []).append(x)",
+    ),
+    "C436": (
+        "d = {}\nfor x in items:\n    y = d[x] if x in d else 0",
+        "d = {}\nfor x in items:\n    y = d.get(x, 0)",
+    ),
+}
+
+# Run in a separate interpreter so timings are not skewed by the state of the
+# checking process. Prints the best time per loop of each statement.
+script = """\
+import sys
+import timeit
+
+setup = "from collections import Counter, deque; from operator import attrgetter"
+setup += f"; items = list(range({int(sys.argv[1])}))"
+for stmt in sys.argv[2:]:
+    timer = timeit.Timer(stmt, setup)
+    number, _ = timer.autorange()
+    print(min(timer.repeat(repeat=3, number=number)) / number)
+"""
+
+
+def measure_speedups(codes: Iterable[str], size: int) -> dict[str, float]:
+    """
+    Time the representative rewrite of each code, returning how many times
+    faster the rewritten code runs.
+    """
+    codes = sorted(c for c in set(codes) if c in rewrites)
+    if not codes:
+        return {}
+    stmts = [stmt for code in codes for stmt in rewrites[code]]
+    output = subprocess.run(
+        [sys.executable, "-c", script, str(size), *stmts],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    times = [float(line) for line in output.split()]
+    return {code: times[2 * i] / times[2 * i + 1] for i, code in enumerate(codes)}
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import ast
+import io
+import tokenize
+from collections.abc import Generator, Iterable
+from typing import TYPE_CHECKING
+
+from flake8_comprehensions import (
+    ComprehensionChecker,
+    Scope,
+    resolve_pending,
+)
+
+if TYPE_CHECKING:
+    from flake8_comprehensions import PendingResult
+
+# Keywords that continue a compound statement at the same indentation.
+continuation_keywords = frozenset({"elif", "else", "except", "finally"})
+
+
+def check_in_chunks(
+    checker: ComprehensionChecker, source: bytes | str
+) -> list[tuple[int, int, str, type[object]]] | None:
+    """
+    Check a module one top-level statement at a time, so peak memory use is
+    bounded by the syntax tree of the largest statement rather than that of
+    the whole module. Results match checking the whole module at once.
+
+    Returns None if the source has a syntax error, to be reported by parsing
+    it whole as normal.
+    """
+    module_scope = Scope(None, "module")
+    pending: list[PendingResult] = []
+    try:
+        if isinstance(source, bytes):
+            encoding, _ = tokenize.detect_encoding(io.BytesIO(source).readline)
+            source = source.decode(encoding)
+        # Split lines on the same line endings as the tokenizer.
+        lines = io.StringIO(source, newline="").readlines()
+
+        start = 1
+        for end in [*statement_starts(lines), len(lines) + 1]:
+            if end == start:
+                continue
+            tree = ast.parse("".join(lines[start - 1 : end - 1]))
+            ast.increment_lineno(tree, start - 1)
+            checker._check_tree(tree, module_scope, pending)
+            start = end
+    except (SyntaxError, ValueError, tokenize.TokenError):
+        return None
+
+    return sorted(resolve_pending(pending), key=lambda r: (r[0], r[1]))
+
+
+def statement_starts(lines: Iterable[str]) -> Generator[int]:
+    """
+    Yield the line number each top-level statement starts on, found with the
+    tokenizer, which keeps no state about previous lines.
+    """
+    depth = 0
+    at_line_start = True
+    decorating = False
+    for token in tokenize.generate_tokens(iter(lines).__next__):
+        if token.type == tokenize.INDENT:
+            depth += 1
+        elif token.type == tokenize.DEDENT:
+            depth -= 1
+        elif token.type == tokenize.NEWLINE:
+            at_line_start = True
+        elif token.type in (tokenize.NL, tokenize.COMMENT, tokenize.ENDMARKER):
+            pass
+        elif at_line_start:
+            at_line_start = False
+            if depth == 0:
+                # Decorators and clauses like else: belong to the statement
+                # before them.
+                if not decorating and token.string not in continuation_keywords:
+                    yield token.start[0]
+                decorating = token.string == "@"
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+from collections import Counter
+from collections.abc import Generator, Sequence
+from typing import TYPE_CHECKING
+
+from flake8_comprehensions import check_sources
+from flake8_comprehensions._archives import (
+    archive_errors,
+    archive_suffixes,
+    read_archive,
+)
+
+if TYPE_CHECKING:
+    from flake8_comprehensions._notebooks import NotebookChecker
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m flake8_comprehensions",
+        description="Check Python files for C4 rules without running Flake8.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help=(
+            "Files or directories to check. Jupyter notebooks are checked cell "
+            + "by cell. Wheels, zip files, and tar files are read without "
+            + "extracting them."
+        ),
+    )
+    parser.add_argument(
+        "--select",
+        type=comma_separated,
+        metavar="CODES",
+        help=(
+            "Comma-separated code prefixes to report, as in Flake8 (default: "
+            + "all codes except the off-by-default ones)."
+        ),
+    )
+    parser.add_argument(
+        "--extend-select",
+        type=comma_separated,
+        default=[],
+        metavar="CODES",
+        help="Comma-separated code prefixes to report in addition to --select.",
+    )
+    parser.add_argument(
+        "--disable-noqa",
+        action="store_true",
+        help="Report results on lines with noqa comments too.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help=(
+            "A cProfile or profile stats file. Results are annotated with the "
+            + "cumulative time of their enclosing function, hottest first."
+        ),
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help=(
+            "After checking, time a representative rewrite for each code found, "
+            + "and report how much faster it runs on this Python."
+        ),
+    )
+    parser.add_argument(
+        "--benchmark-size",
+        type=int,
+        default=1000,
+        metavar="N",
+        help="Number of items in the input to benchmarked code (default: 1000).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes to check files with (default: 1).",
+    )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help=(
+            "Use worker threads rather than processes, which is faster on "
+            + "free-threaded Python builds."
+        ),
+    )
+    parser.add_argument(
+        "--large-file-bytes",
+        type=int,
+        metavar="N",
+        help=(
+            "Check files larger than N bytes one top-level statement at a time, "
+            + "to bound memory use on very large modules."
+        ),
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "jsonl", "sarif"],
+        default="text",
+        help=(
+            "Output format: text in Flake8's format (default), JSON Lines, or "
+            + "SARIF. JSON Lines and SARIF output is written as results arrive, "
+            + "and ends with counts per code and per directory."
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Keep running, re-checking files when their modification time or "
+            + "size changes, and printing results added (+) and removed (-)."
+        ),
+    )
+    args = parser.parse_args(argv)
+    if args.format != "text" and (args.profile or args.benchmark or args.watch):
+        parser.error(
+            "--format is only supported without --profile, --benchmark, or --watch"
+        )
+
+    if args.profile:
+        return run_profiled(args.paths, args.profile, args)
+    if args.watch:
+        from flake8_comprehensions._watch import watch
+
+        return watch(args.paths, args)
+
+    if args.format != "text":
+        from flake8_comprehensions._output import write_json_lines, write_sarif
+
+        writer = write_json_lines if args.format == "jsonl" else write_sarif
+        summary = writer(check_paths(args.paths, args), sys.stdout)
+        return int(bool(summary.codes))
+
+    counts: Counter[str] = Counter()
+    for path, line, col, message in check_paths(args.paths, args):
+        counts[message[:4]] += 1
+        print(f"{path}:{line}:{col + 1}: {message}")
+
+    if args.benchmark:
+        report_speedups(counts, args.benchmark_size)
+    return int(bool(counts))
+
+
+def comma_separated(value: str) -> list[str]:
+    return [code for code in re.split(r"[,\s]+", value) if code]
+
+
+def check_paths(
+    paths: Sequence[str],
+    args: argparse.Namespace,
+    notebook_checker: NotebookChecker | None = None,
+) -> Generator[tuple[str, int, int, str]]:
+    """
+    Check Python files, then notebooks, yielding results in file order.
+    Notebook results are located by cell, like ``example.ipynb:cell_3``.
+    Pass a notebook_checker to reuse its cache of checked cells.
+    """
+    notebooks = []
+
+    def python_sources() -> Generator[tuple[str, bytes]]:
+        for path, source in read_files(paths):
+            if path.endswith(".ipynb"):
+                notebooks.append((path, source))
+            else:
+                yield path, source
+
+    yield from check_sources(
+        python_sources(),
+        workers=args.jobs,
+        threads=args.threads,
+        large_file_bytes=args.large_file_bytes,
+        select=args.select,
+        extend_select=args.extend_select,
+        disable_noqa=args.disable_noqa,
+    )
+
+    if notebooks:
+        if notebook_checker is None:
+            from flake8_comprehensions._notebooks import NotebookChecker
+
+            notebook_checker = NotebookChecker()
+        for path, source in notebooks:
+            try:
+                results = notebook_checker.check(
+                    source,
+                    path=path,
+                    select=args.select,
+                    extend_select=args.extend_select,
+                    disable_noqa=args.disable_noqa,
+                )
+            except (ValueError, TypeError, AttributeError) as exc:
+                print(f"{path}: could not be checked: {exc}", file=sys.stderr)
+                continue
+            for cell, line, col, message in results:
+                yield f"{path}:cell_{cell}", line, col, message
+
+
+def iter_python_files(paths: Sequence[str]) -> Generator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(
+                    d for d in dirs if not d.startswith(".") and d != "__pycache__"
+                )
+                for name in sorted(files):
+                    if name.endswith((".py", ".ipynb")):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def read_files(paths: Sequence[str]) -> Generator[tuple[str, bytes]]:
+    for path in iter_python_files(paths):
+        try:
+            if path.endswith(archive_suffixes):
+                yield from read_archive(path)
+            else:
+                with open(path, "rb") as fp:
+                    yield path, fp.read()
+        except (OSError, *archive_errors) as exc:
+            print(f"{path}: could not be read: {exc}", file=sys.stderr)
+
+
+def run_profiled(paths: Sequence[str], profile: str, args: argparse.Namespace) -> int:
+    from flake8_comprehensions._profile import (
+        enclosing_function,
+        load_cumulative_times,
+        path_function_spans,
+    )
+
+    times = load_cumulative_times(profile)
+    spans: dict[str, list[tuple[int, int, int, str]]] = {}
+    ranked = []
+    for path, line, col, message in check_paths(paths, args):
+        if path not in spans:
+            spans[path] = path_function_spans(path)
+        first_line, function = enclosing_function(spans[path], line)
+        cumtime = times.get((os.path.realpath(path), first_line), 0.0)
+        ranked.append((-cumtime, path, line, col, message, function))
+
+    ranked.sort()
+    for negative_cumtime, path, line, col, message, function in ranked:
+        print(
+            f"{path}:{line}:{col + 1}: {message} "
+            + f"({-negative_cumtime:.3f}s in {function})"
+        )
+    return int(bool(ranked))
+
+
+def report_speedups(counts: Counter[str], size: int) -> None:
+    from flake8_comprehensions._benchmark import measure_speedups
+
+    speedups = measure_speedups(counts, size)
+    for code, speedup in sorted(speedups.items()):
+        print(
+            f"{code}: {counts[code]} result{'s' if counts[code] != 1 else ''}, "
+            + f"rewrite measured {speedup:.2f}x as fast with {size} items"
+        )
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import io
+import re
+import tokenize
+
+# Flake8's patterns for noqa comments, which skip results on their line,
+# optionally only for the codes listed after a colon, and "flake8: noqa"
+# comments on their own line, which skip a whole file.
+noqa_inline = re.compile(
+    r"# noqa(?::[\s]?(?P<codes>([A-Z]+[0-9]+(?:[,\s]+)?)+))?",
+    re.IGNORECASE,
+)
+noqa_file = re.compile(r"\s*# flake8[:=]\s*noqa", re.IGNORECASE)
+
+
+def remove_noqa(
+    source: bytes | str, results: list[tuple[int, int, str]]
+) -> list[tuple[int, int, str]]:
+    """
+    Drop (line, col, message) results skipped by ``noqa`` comments, as Flake8
+    does.
+    """
+    if isinstance(source, bytes):
+        try:
+            encoding, _ = tokenize.detect_encoding(io.BytesIO(source).readline)
+            source = source.decode(encoding)
+        except (SyntaxError, UnicodeDecodeError):
+            return results
+    # Split lines on the same line endings as the tokenizer.
+    lines = io.StringIO(source, newline="").readlines()
+    if any(noqa_file.match(line) for line in lines):
+        return []
+
+    noqa_lines = noqa_line_mapping(lines)
+    kept = []
+    for result in results:
+        line, _, message = result
+        text = noqa_lines.get(line)
+        if text is None:
+            text = lines[line - 1] if 0 < line <= len(lines) else ""
+        match = noqa_inline.search(text)
+        if match is not None:
+            codes = match["codes"]
+            if codes is None:
+                continue
+            code = message.split(" ", 1)[0]
+            if code.startswith(tuple(c for c in re.split(r"[,\s]+", codes) if c)):
+                continue
+        kept.append(result)
+    return kept
+
+
+def noqa_line_mapping(lines: list[str]) -> dict[int, str]:
+    """
+    Map line numbers to the text searched for ``noqa`` comments. As in
+    Flake8, a token spanning several lines, such as a triple-quoted string,
+    joins them, so a comment after it applies to all of them.
+    """
+    mapping: dict[int, str] = {}
+    first = last = None
+    try:
+        for token in tokenize.generate_tokens(iter(lines).__next__):
+            if token.type in (tokenize.ENDMARKER, tokenize.DEDENT):
+                continue
+            if first is None or last is None:
+                first, last = token.start[0], token.end[0]
+            else:
+                first = min(first, token.start[0])
+                last = max(last, token.end[0])
+            if token.type in (tokenize.NL, tokenize.NEWLINE):
+                joined = "".join(lines[first - 1 : last])
+                mapping.update(dict.fromkeys(range(first, last + 1), joined))
+                first = last = None
+    except (SyntaxError, tokenize.TokenError):
+        return {}
+    return mapping
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import ast
+import hashlib
+import io
+import json
+import tokenize
+from typing import TYPE_CHECKING, Any
+
+from flake8_comprehensions import (
+    ComprehensionChecker,
+    Scope,
+    filter_results,
+    resolve_pending,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from flake8_comprehensions import PendingResult
+
+    # A checked cell's pending results, and its module scope.
+    CellResults = tuple[list[PendingResult], Scope]
+
+
+class NotebookChecker:
+    """
+    Check Jupyter notebooks cell by cell. Each cell's results are cached by
+    its content hash, per notebook path, so re-checking a notebook where one
+    cell has changed only parses that cell. Cells no longer in a notebook are
+    dropped from its cache when it is re-checked.
+
+    Cells share one namespace when run, so a builtin rebound at the top level
+    of any cell counts as shadowed in all of them.
+    """
+
+    def __init__(self) -> None:
+        self.checker = ComprehensionChecker(ast.Module(body=[], type_ignores=[]))
+        self.cells: dict[str, dict[str, CellResults]] = {}
+
+    def check(
+        self,
+        source: bytes | str,
+        *,
+        path: str = "",
+        select: Sequence[str] | None = None,
+        extend_select: Sequence[str] = (),
+        disable_noqa: bool = False,
+    ) -> list[tuple[int, int, int, str]]:
+        """
+        Return (cell, line, col, message) results for a notebook, with cells
+        numbered from 1 by their position in the notebook. Codes are selected
+        and noqa comments honoured as by check_sources(), per cell. The path
+        names the notebook's cache of cells.
+        """
+        cached = self.cells.get(path, {})
+        cells: dict[str, CellResults] = {}
+        checked = []
+        for number, cell_source in code_cells(source):
+            key = cell_key(cell_source)
+            cell = cells.get(key) or cached.get(key) or self.check_cell(cell_source)
+            cells[key] = cell
+            checked.append((number, cell_source, cell))
+        self.cells[path] = cells
+
+        module_bound: set[str] = set()
+        for _, _, (_, module_scope) in checked:
+            module_bound |= module_scope.bound
+
+        results: list[tuple[int, int, int, str]] = []
+        for number, cell_source, (pending, _) in checked:
+            cell_results = [
+                (line, col, message)
+                for line, col, message, _ in resolve_pending(pending, module_bound)
+            ]
+            cell_results = filter_results(
+                cell_source, cell_results, select, extend_select, disable_noqa
+            )
+            results.extend((number, *result) for result in cell_results)
+        results.sort()
+        return results
+
+    def check_cell(self, source: str) -> CellResults:
+        """
+        Check one cell, returning its pending results and module scope.
+        """
+        module_scope = Scope(None, "module")
+        pending: list[PendingResult] = []
+        try:
+            tree = ast.parse(source)
+        except SyntaxError as exc:
+            result = (
+                exc.lineno or 1,
+                max((exc.offset or 1) - 1, 0),
+                f"E999 {type(exc).__name__}: {exc.args[0]}",
+                type(self.checker),
+            )
+            pending.append((result, (), module_scope, ()))
+        else:
+            self.checker._check_tree(tree, module_scope, pending)
+            if tree.body and isinstance(tree.body[-1], ast.Expr):
+                # A cell displays the value of its last expression, so a
+                # comprehension there is not unused.
+                last = tree.body[-1].value
+                pending = [
+                    item
+                    for item in pending
+                    if not item[0][2].startswith("C433")
+                    or item[0][:2] != (last.lineno, last.col_offset)
+                ]
+        return pending, module_scope
+
+
+def cell_key(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def code_cells(source: bytes | str) -> list[tuple[int, str]]:
+    """
+    Return the (number, source) of each code cell in a notebook, with IPython
+    magics and shell commands replaced by ``pass`` to keep line numbers.
+    Cells starting with a cell magic, such as ``%%bash``, are skipped.
+    """
+    notebook: dict[str, Any] = json.loads(source)
+    cells = []
+    for number, cell in enumerate(notebook.get("cells", []), start=1):
+        if cell.get("cell_type") != "code":
+            continue
+        cell_source = cell.get("source", "")
+        if isinstance(cell_source, list):
+            cell_source = "".join(cell_source)
+        if cell_source.lstrip().startswith("%%"):
+            continue
+        cells.append((number, strip_magics(cell_source)))
+    return cells
+
+
+def strip_magics(source: str) -> str:
+    """
+    Replace IPython magics, shell commands, and help requests like ``df?``
+    with ``pass``. They are only recognized at the start of a logical line,
+    found with the tokenizer, so continuation lines like ``    != other``
+    and comments like ``# really?`` are kept.
+    """
+    # Split lines on the same line endings as the tokenizer.
+    lines = io.StringIO(source, newline="").readlines()
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        stripped = line.lstrip()
+        indent = line[: len(line) - len(stripped)]
+        if stripped.startswith(("%", "!")):
+            lines[index] = indent + "pass\n"
+            index += 1
+            continue
+        end, last_token = logical_line_end(lines, index)
+        if last_token == "?":
+            lines[index:end] = [indent + "pass\n"] + ["\n"] * (end - index - 1)
+        index = end
+    return "".join(lines)
+
+
+def logical_line_end(lines: list[str], start: int) -> tuple[int, str]:
+    """
+    Return the index of the line after the logical line starting at the given
+    index, and the last token on the logical line, ignoring comments.
+    """
+    last_token = ""
+    try:
+        for token in tokenize.generate_tokens(iter(lines[start:]).__next__):
+            if token.type == tokenize.NEWLINE or (
+                token.type == tokenize.NL and not last_token
+            ):
+                return start + token.end[0], last_token
+            if token.type == tokenize.ENDMARKER:
+                break
+            if token.type not in skipped_token_types:
+                last_token = token.string
+    except (SyntaxError, tokenize.TokenError):
+        # Left for parsing the cell to report.
+        pass
+    return len(lines), last_token
+
+
+# Tokens that don't end a logical line's code.
+skipped_token_types = frozenset(
+    {tokenize.COMMENT, tokenize.DEDENT, tokenize.INDENT, tokenize.NL}
+)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any, TextIO
+
+from flake8_comprehensions import ComprehensionChecker, Result
+
+sarif_schema = "https://json.schemastore.org/sarif-2.1.0.json"
+
+
+class Summary:
+    """
+    Counts of results per code, and per directory of the file they are in.
+    """
+
+    def __init__(self) -> None:
+        self.codes: Counter[str] = Counter()
+        self.directories: Counter[str] = Counter()
+
+    def add(self, path: str, message: str) -> None:
+        self.codes[message[:4]] += 1
+        self.directories[os.path.dirname(path) or "."] += 1
+
+    def as_json(self) -> dict[str, Any]:
+        return {
+            "total": self.codes.total(),
+            "codes": dict(sorted(self.codes.items())),
+            "directories": dict(sorted(self.directories.items())),
+        }
+
+
+def write_json_lines(results: Iterable[Result], out: TextIO) -> Summary:
+    """
+    Write a JSON object per result as it arrives, followed by one summary
+    object with counts per code and per directory.
+    """
+    summary = Summary()
+    for path, line, col, message in results:
+        summary.add(path, message)
+        record = {
+            "type": "result",
+            "path": path,
+            "line": line,
+            "column": col + 1,
+            "code": message[:4],
+            "message": message[5:],
+        }
+        print(json.dumps(record), file=out, flush=True)
+    print(json.dumps({"type": "summary", **summary.as_json()}), file=out, flush=True)
+    return summary
+
+
+def write_sarif(results: Iterable[Result], out: TextIO) -> Summary:
+    """
+    Write a SARIF log, one result at a time as they arrive. The summary of
+    counts per code and per directory goes in the run's properties.
+    """
+    summary = Summary()
+    tool = {
+        "driver": {
+            "name": ComprehensionChecker.name,
+            "version": ComprehensionChecker.version,
+            "informationUri": "https://github.com/adamchainz/flake8-comprehensions",
+        }
+    }
+    print(
+        f'{{"$schema": "{sarif_schema}", "version": "2.1.0", '
+        + f'"runs": [{{"tool": {json.dumps(tool)}, "results": [',
+        file=out,
+        flush=True,
+    )
+    separator = ""
+    for path, line, col, message in results:
+        summary.add(path, message)
+        result = {
+            "ruleId": message[:4],
+            "level": "error" if message.startswith("E") else "warning",
+            "message": {"text": message[5:]},
+            "locations": [
+                {
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": path.replace(os.sep, "/")},
+                        "region": {"startLine": line, "startColumn": col + 1},
+                    }
+                }
+            ],
+        }
+        print(separator + json.dumps(result), file=out, flush=True)
+        separator = ","
+    print(
+        f'], "properties": {{"summary": {json.dumps(summary.as_json())}}}}}]}}',
+        file=out,
+        flush=True,
+    )
+    return summary
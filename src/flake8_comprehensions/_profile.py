@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import ast
+import os
+import pstats
+
+# Line number used for module-level code, which has no enclosing function.
+MODULE_LINE = 0
+
+
+def load_cumulative_times(path: str) -> dict[tuple[str, int], float]:
+    """
+    Load cumulative times from a cProfile/profile stats file, keyed by the
+    real path of each function's file and its first line number.
+    """
+    times: dict[tuple[str, int], float] = {}
+    stats = pstats.Stats(path).stats  # type: ignore[attr-defined]
+    for (filename, lineno, funcname), (_, _, _, cumtime, _) in stats.items():
+        if funcname == "<module>":
+            lineno = MODULE_LINE
+        key = (os.path.realpath(filename), lineno)
+        times[key] = times.get(key, 0.0) + cumtime
+    return times
+
+
+def function_spans(tree: ast.AST) -> list[tuple[int, int, int, str]]:
+    """
+    The (start, end, first line, name) of each function in the tree. The first
+    line matches the code object's co_firstlineno, which is the line of the
+    first decorator for decorated functions.
+    """
+    spans = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            first_line = (
+                node.decorator_list[0].lineno if node.decorator_list else node.lineno
+            )
+            end_line = node.end_lineno or node.lineno
+            spans.append((first_line, end_line, first_line, node.name))
+    return spans
+
+
+def path_function_spans(path: str) -> list[tuple[int, int, int, str]]:
+    """
+    The function spans of a checked file. Notebook cells, archive members, and
+    files that cannot be parsed have none, so all their results are counted as
+    module-level code, which is not in the profile.
+    """
+    try:
+        with open(path, "rb") as fp:
+            return function_spans(ast.parse(fp.read(), path))
+    except (OSError, SyntaxError, ValueError):
+        return []
+
+
+def enclosing_function(
+    spans: list[tuple[int, int, int, str]], line: int
+) -> tuple[int, str]:
+    """
+    The first line and name of the innermost function containing a line.
+    """
+    best = (MODULE_LINE, MODULE_LINE, MODULE_LINE, "<module>")
+    for span in spans:
+        if span[0] <= line <= span[1] and span[0] >= best[0]:
+            best = span
+    return best[2], best[3]
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from collections.abc import Sequence
+
+from flake8_comprehensions import Result
+from flake8_comprehensions._main import check_paths, iter_python_files
+from flake8_comprehensions._notebooks import NotebookChecker
+
+# Seconds between polls of file modification times and sizes.
+poll_interval = 0.5
+
+
+class Watcher:
+    """
+    Keep results for a set of paths in memory, re-checking only the files
+    whose modification time or size has changed since the last poll.
+    """
+
+    def __init__(self, paths: Sequence[str], args: argparse.Namespace) -> None:
+        self.paths = paths
+        # Polls check a few files at a time, so a worker pool would cost
+        # more to start than it saves.
+        self.args = argparse.Namespace(**{**vars(args), "jobs": 1})
+        self.notebook_checker = NotebookChecker()
+        self.stats: dict[str, tuple[int, int]] = {}
+        self.results: dict[str, list[Result]] = {}
+
+    def poll(self) -> tuple[list[Result], list[Result]]:
+        """
+        Re-check changed files, returning the results added and removed since
+        the last poll.
+        """
+        stats = {}
+        for path in iter_python_files(self.paths):
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (stat_result.st_mtime_ns, stat_result.st_size)
+
+        added: list[Result] = []
+        removed: list[Result] = []
+        for path in sorted(self.stats.keys() - stats.keys()):
+            removed.extend(self.results.pop(path))
+            self.notebook_checker.cells.pop(path, None)
+        for path, stat in stats.items():
+            if self.stats.get(path) == stat:
+                continue
+            old_results = self.results.get(path, [])
+            new_results = list(check_paths([path], self.args, self.notebook_checker))
+            self.results[path] = new_results
+            old_set = set(old_results)
+            new_set = set(new_results)
+            removed.extend(r for r in old_results if r not in new_set)
+            added.extend(r for r in new_results if r not in old_set)
+        self.stats = stats
+        return added, removed
+
+
+def watch(paths: Sequence[str], args: argparse.Namespace) -> int:
+    watcher = Watcher(paths, args)
+    added, _ = watcher.poll()
+    for path, line, col, message in added:
+        print(f"{path}:{line}:{col + 1}: {message}", flush=True)
+    try:
+        while True:
+            time.sleep(poll_interval)
+            added, removed = watcher.poll()
+            for path, line, col, message in removed:
+                print(f"- {path}:{line}:{col + 1}: {message}", flush=True)
+            for path, line, col, message in added:
+                print(f"+ {path}:{line}:{col + 1}: {message}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    return int(any(watcher.results.values()))
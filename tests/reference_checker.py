@@ -0,0 +1,623 @@
+"""
+The rule engine as it was before it was optimized, as a reference for the
+differential tests in test_differential.py: a plain ast.walk() over the tree,
+with a chain of checks per node. Rebound builtins, and chains of calls that
+C413 and C414 report once, are handled by naive passes over its results.
+Optimizations to ComprehensionChecker must keep its results identical to
+this, so only change it along with intentional changes to rules' behaviour.
+"""
+
+from __future__ import annotations
+
+import ast
+from collections.abc import Generator
+from typing import Any
+
+# The simplified code for a chain is tested by the rule tests, so is not
+# recomputed here.
+from flake8_comprehensions import fuse_call_chain
+
+
+class ReferenceChecker:
+    __slots__ = ("tree",)
+
+    def __init__(self, tree: ast.AST) -> None:
+        self.tree = tree
+
+    messages = {
+        "C400": "C400 Unnecessary generator - rewrite as a list comprehension.",
+        "C401": "C401 Unnecessary generator - rewrite as a set comprehension.",
+        "C402": "C402 Unnecessary generator - rewrite as a dict comprehension.",
+        "C403": "C403 Unnecessary list comprehension - rewrite as a set comprehension.",
+        "C404": (
+            "C404 Unnecessary list comprehension - rewrite as a dict comprehension."
+        ),
+        "C405": "C405 Unnecessary {type} literal - ",
+        "C406": "C406 Unnecessary {type} literal - ",
+        "C408": "C408 Unnecessary {type} call - rewrite as a literal.",
+        "C409": "C409 Unnecessary {type} passed to tuple() - ",
+        "C410": "C410 Unnecessary {type} passed to list() - ",
+        "C411": "C411 Unnecessary list call - remove the outer call to list().",
+        "C413": "C413 Unnecessary {outer} call around {inner}(){remediation}.",
+        "C414": "C414 Unnecessary {inner} call within {outer}(){remediation}.",
+        "C415": "C415 Unnecessary subscript reversal of iterable within {func}().",
+        "C416": "C416 Unnecessary {type} comprehension - rewrite using {type}().",
+        "C417": "C417 Unnecessary use of map - use a {comp} instead.",
+        "C418": (
+            "C418 Unnecessary {type} passed to dict() - "
+            + "remove the outer call to dict()."
+        ),
+        "C419": (
+            "C419 Unnecessary list comprehension passed to {func}() prevents "
+            + "short-circuiting - rewrite as a generator."
+        ),
+        "C420": (
+            "C420 Unnecessary {type} comprehension - rewrite using dict.fromkeys()."
+        ),
+    }
+
+    def run(self) -> Generator[tuple[int, int, str, type[Any]]]:
+        bindings = scope_bindings(self.tree)
+        parents = {
+            child: parent
+            for parent in ast.walk(self.tree)
+            for child in ast.iter_child_nodes(parent)
+        }
+
+        # Find the chains of calls reported once, on their outermost call.
+        # A chain relying on a rebound builtin is reported one call at a time.
+        fused: dict[ast.AST, str] = {}
+        fused_calls: set[ast.AST] = set()
+        chained_calls: set[ast.AST] = set()
+        for node, (_, _, message, _) in self.check_nodes(set()):
+            if message.startswith(("C413", "C414")) and node not in chained_calls:
+                assert isinstance(node, ast.Call)
+                chain, simplified = fuse_call_chain(node)
+                if len(chain) < 2:
+                    continue
+                chained_calls.update(chain)
+                scopes = evaluating_scopes(node, parents)
+                if not any(
+                    is_rebound(name, scopes, bindings)
+                    for name in called_builtins(node)[: len(chain) + 1]
+                ):
+                    fused[node] = simplified
+                    fused_calls.update(chain)
+
+        for node, (line, col, message, checker_type) in self.check_nodes(fused_calls):
+            # Most rules rely only on the builtin called, and C417 on
+            # list(map(...)) and the like on the map() call too.
+            names = called_builtins(node)[:1]
+            if message.startswith("C417") and names[:1] != ["map"]:
+                names = called_builtins(node)[:2]
+            if message.startswith(("C413", "C414")):
+                assert isinstance(node, ast.Call)
+                assert isinstance(node.func, ast.Name)
+                inner = node.args[0]
+                assert isinstance(inner, ast.Call) and isinstance(inner.func, ast.Name)
+                if node in fused:
+                    names = called_builtins(node)
+                    message = self.messages[message[:4]].format(
+                        inner=inner.func.id,
+                        outer=node.func.id,
+                        remediation=f" - rewrite as {fused[node]}",
+                    )
+                else:
+                    # Only the outer and inner calls matter to a single layer.
+                    names = [node.func.id, inner.func.id]
+            scopes = evaluating_scopes(node, parents)
+            if not any(is_rebound(name, scopes, bindings) for name in names):
+                yield line, col, message, checker_type
+
+    def check_nodes(
+        self, skipped: set[ast.AST]
+    ) -> Generator[tuple[ast.AST, tuple[int, int, str, type[Any]]]]:
+        """
+        The rule engine as it was before it was optimized, yielding each
+        result with the node it is for.
+        """
+        # Stores previously seen map() nodes, to avoid raising C417 on it twice.
+        visited_map_calls: set[ast.Call] = set()
+
+        for node in ast.walk(self.tree):
+            if node in skipped:
+                continue
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+                num_positional_args = len(node.args)
+                num_keyword_args = len(node.keywords)
+
+                if (
+                    num_positional_args == 1
+                    and isinstance(node.args[0], ast.GeneratorExp)
+                    and node.func.id in ("list", "set")
+                ):
+                    msg_key = {"list": "C400", "set": "C401"}[node.func.id]
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            self.messages[msg_key],
+                            type(self),
+                        ),
+                    )
+
+                elif (
+                    num_positional_args == 1
+                    and node.func.id == "dict"
+                    and len(node.keywords) == 0
+                    and isinstance(node.args[0], (ast.GeneratorExp, ast.ListComp))
+                    and isinstance(node.args[0].elt, ast.Tuple)
+                    and len(node.args[0].elt.elts) == 2
+                ):
+                    if isinstance(node.args[0], ast.GeneratorExp):
+                        msg = "C402"
+                    else:
+                        msg = "C404"
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            self.messages[msg],
+                            type(self),
+                        ),
+                    )
+
+                elif (
+                    num_positional_args == 1
+                    and isinstance(node.args[0], ast.ListComp)
+                    and node.func.id in ("list", "set", "any", "all")
+                ):
+                    msg_key = {
+                        "list": "C411",
+                        "set": "C403",
+                        "any": "C419",
+                        "all": "C419",
+                    }[node.func.id]
+                    msg = self.messages[msg_key].format(func=node.func.id)
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            msg,
+                            type(self),
+                        ),
+                    )
+
+                elif num_positional_args == 1 and (
+                    isinstance(node.args[0], ast.Tuple)
+                    and node.func.id == "tuple"
+                    or isinstance(node.args[0], ast.List)
+                    and node.func.id == "list"
+                ):
+                    suffix = "remove the outer call to {func}()."
+                    msg_key = {"tuple": "C409", "list": "C410"}[node.func.id]
+                    msg = self.messages[msg_key] + suffix
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            msg.format(
+                                type=type(node.args[0]).__name__.lower(),
+                                func=node.func.id,
+                            ),
+                            type(self),
+                        ),
+                    )
+
+                elif (
+                    num_positional_args == 1
+                    and num_keyword_args == 0
+                    and isinstance(node.args[0], (ast.Dict, ast.DictComp))
+                    and node.func.id == "dict"
+                ):
+                    if isinstance(node.args[0], ast.Dict):
+                        type_ = "dict"
+                    else:
+                        type_ = "dict comprehension"
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            self.messages["C418"].format(type=type_),
+                            type(self),
+                        ),
+                    )
+
+                elif (
+                    num_positional_args == 1
+                    and isinstance(node.args[0], (ast.Tuple, ast.List))
+                    and (
+                        node.func.id in ("tuple", "list", "set")
+                        or (
+                            node.func.id == "dict"
+                            and all(
+                                isinstance(i, ast.Tuple) and len(i.elts) == 2
+                                for i in node.args[0].elts
+                            )
+                        )
+                    )
+                ):
+                    suffix = "rewrite as a {func} literal."
+                    msg_key = {
+                        "tuple": "C409",
+                        "list": "C410",
+                        "set": "C405",
+                        "dict": "C406",
+                    }[node.func.id]
+                    msg = self.messages[msg_key] + suffix
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            msg.format(
+                                type=type(node.args[0]).__name__.lower(),
+                                func=node.func.id,
+                            ),
+                            type(self),
+                        ),
+                    )
+
+                elif (
+                    num_positional_args == 0
+                    and not has_star_args(node)
+                    and not has_double_star_args(node)
+                    and node.func.id == "dict"
+                ) or (
+                    num_positional_args == 0
+                    and num_keyword_args == 0
+                    and node.func.id in ("tuple", "list")
+                ):
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            self.messages["C408"].format(type=node.func.id),
+                            type(self),
+                        ),
+                    )
+
+                elif (
+                    node.func.id in {"list", "reversed"}
+                    and num_positional_args > 0
+                    and isinstance(node.args[0], ast.Call)
+                    and isinstance(node.args[0].func, ast.Name)
+                    and node.args[0].func.id == "sorted"
+                ):
+                    remediation = ""
+                    if node.func.id == "reversed":
+                        reverse_flag_value: bool | None = False
+                        for keyword in node.args[0].keywords:
+                            if keyword.arg != "reverse":
+                                continue
+                            if isinstance(keyword.value, ast.Constant):
+                                reverse_flag_value = bool(keyword.value.value)
+                            else:
+                                # Complex value
+                                reverse_flag_value = None
+
+                        if reverse_flag_value is None:
+                            remediation = " - toggle reverse argument to sorted()"
+                        else:
+                            remediation = f" - use sorted(..., reverse={not reverse_flag_value!r})"
+
+                    msg = self.messages["C413"].format(
+                        inner=node.args[0].func.id,
+                        outer=node.func.id,
+                        remediation=remediation,
+                    )
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            msg,
+                            type(self),
+                        ),
+                    )
+
+                elif (
+                    num_positional_args > 0
+                    and isinstance(node.args[0], ast.Call)
+                    and isinstance(node.args[0].func, ast.Name)
+                    and (
+                        (
+                            node.func.id in {"set", "sorted"}
+                            and node.args[0].func.id
+                            in {"list", "reversed", "sorted", "tuple"}
+                        )
+                        or (
+                            node.func.id in {"list", "tuple"}
+                            and node.args[0].func.id in {"list", "tuple"}
+                        )
+                        or (node.func.id == "set" and node.args[0].func.id == "set")
+                    )
+                ):
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            self.messages["C414"].format(
+                                inner=node.args[0].func.id,
+                                outer=node.func.id,
+                                remediation="",
+                            ),
+                            type(self),
+                        ),
+                    )
+
+                elif (
+                    node.func.id in {"reversed", "set", "sorted"}
+                    and num_positional_args > 0
+                    and isinstance(node.args[0], ast.Subscript)
+                    and isinstance(node.args[0].slice, ast.Slice)
+                    and node.args[0].slice.lower is None
+                    and node.args[0].slice.upper is None
+                    and isinstance(node.args[0].slice.step, ast.UnaryOp)
+                    and isinstance(node.args[0].slice.step.op, ast.USub)
+                    and isinstance(node.args[0].slice.step.operand, ast.Constant)
+                    and node.args[0].slice.step.operand.value == 1
+                ):
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            self.messages["C415"].format(func=node.func.id),
+                            type(self),
+                        ),
+                    )
+
+                elif (
+                    node.func.id == "map"
+                    and node not in visited_map_calls
+                    and len(node.args) == 2
+                    and isinstance(node.args[0], ast.Lambda)
+                ):
+                    yield (
+                        node,
+                        (
+                            node.lineno,
+                            node.col_offset,
+                            self.messages["C417"].format(comp="generator expression"),
+                            type(self),
+                        ),
+                    )
+
+                elif (
+                    node.func.id in ("list", "set", "dict")
+                    and len(node.args) == 1
+                    and isinstance(node.args[0], ast.Call)
+                    and isinstance(node.args[0].func, ast.Name)
+                    and node.args[0].func.id == "map"
+                    and len(node.args[0].args) == 2
+                    and isinstance(node.args[0].args[0], ast.Lambda)
+                ):
+                    # To avoid raising C417 on the map() call inside the list/set/dict.
+                    map_call = node.args[0]
+                    visited_map_calls.add(map_call)
+
+                    rewriteable = True
+                    if node.func.id == "dict":
+                        # For the generator expression to be rewriteable as a
+                        # dict comprehension, its lambda must return a 2-tuple.
+                        lambda_node = node.args[0].args[0]
+                        if (
+                            not isinstance(lambda_node.body, (ast.List, ast.Tuple))
+                            or len(lambda_node.body.elts) != 2
+                        ):
+                            rewriteable = False
+
+                    if rewriteable:
+                        comprehension_type = f"{node.func.id} comprehension"
+                        yield (
+                            node,
+                            (
+                                node.lineno,
+                                node.col_offset,
+                                self.messages["C417"].format(comp=comprehension_type),
+                                type(self),
+                            ),
+                        )
+
+            elif isinstance(node, (ast.DictComp, ast.ListComp, ast.SetComp)):
+                if (
+                    len(node.generators) == 1
+                    and not node.generators[0].ifs
+                    and not node.generators[0].is_async
+                ):
+                    if (
+                        isinstance(node, (ast.ListComp, ast.SetComp))
+                        and isinstance(node.elt, ast.Name)
+                        and isinstance(node.generators[0].target, ast.Name)
+                        and node.elt.id == node.generators[0].target.id
+                    ) or (
+                        isinstance(node, ast.DictComp)
+                        and isinstance(node.key, ast.Name)
+                        and isinstance(node.value, ast.Name)
+                        and isinstance(node.generators[0].target, ast.Tuple)
+                        and len(node.generators[0].target.elts) == 2
+                        and isinstance(node.generators[0].target.elts[0], ast.Name)
+                        and node.generators[0].target.elts[0].id == node.key.id
+                        and isinstance(node.generators[0].target.elts[1], ast.Name)
+                        and node.generators[0].target.elts[1].id == node.value.id
+                    ):
+                        yield (
+                            node,
+                            (
+                                node.lineno,
+                                node.col_offset,
+                                self.messages["C416"].format(
+                                    type=comp_type[node.__class__]
+                                ),
+                                type(self),
+                            ),
+                        )
+
+                    elif (
+                        isinstance(node, ast.DictComp)
+                        and isinstance(node.key, ast.Name)
+                        and isinstance(node.value, ast.Constant)
+                        and isinstance(node.generators[0].target, ast.Name)
+                        and node.key.id == node.generators[0].target.id
+                    ):
+                        yield (
+                            node,
+                            (
+                                node.lineno,
+                                node.col_offset,
+                                self.messages["C420"].format(
+                                    type=comp_type[node.__class__]
+                                ),
+                                type(self),
+                            ),
+                        )
+
+
+def has_star_args(call_node: ast.Call) -> bool:
+    return any(isinstance(a, ast.Starred) for a in call_node.args)
+
+
+def has_double_star_args(call_node: ast.Call) -> bool:
+    return any(k.arg is None for k in call_node.keywords)
+
+
+comp_type = {
+    ast.DictComp: "dict",
+    ast.ListComp: "list",
+    ast.SetComp: "set",
+}
+
+
+# The builtins that rules rely on, which count as rebound when bound anywhere
+# in a scope the call is evaluated in.
+rule_builtins = frozenset(
+    {
+        "all",
+        "any",
+        "dict",
+        "frozenset",
+        "len",
+        "list",
+        "map",
+        "max",
+        "min",
+        "range",
+        "reversed",
+        "set",
+        "sorted",
+        "sum",
+        "tuple",
+    }
+)
+
+
+def called_builtins(node: ast.AST) -> list[str]:
+    """
+    The builtins called by a call, and by the calls nested in its first
+    argument.
+    """
+    names = []
+    while isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        if node.func.id in rule_builtins:
+            names.append(node.func.id)
+        if not node.args:
+            break
+        node = node.args[0]
+    return names
+
+
+def evaluating_scopes(node: ast.AST, parents: dict[ast.AST, ast.AST]) -> list[ast.AST]:
+    """
+    The scopes a node is evaluated in, innermost first, ending with the
+    module. Default values, decorators, return annotations, class bases, and
+    the first iterable of a comprehension are evaluated in the enclosing
+    scope.
+    """
+    scopes = []
+    below: ast.AST | None = None
+    child = node
+    while child in parents:
+        parent = parents[child]
+        if isinstance(parent, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            if child is parent.args:
+                within = below not in (*parent.args.defaults, *parent.args.kw_defaults)
+            elif isinstance(parent, ast.Lambda):
+                within = True
+            else:
+                within = child in parent.body
+        elif isinstance(parent, ast.ClassDef):
+            within = child in parent.body
+        elif isinstance(
+            parent, (ast.DictComp, ast.GeneratorExp, ast.ListComp, ast.SetComp)
+        ):
+            first = parent.generators[0]
+            within = child is not first or below is not first.iter
+        else:
+            within = False
+        if within:
+            scopes.append(parent)
+        below, child = child, parent
+    scopes.append(child)
+    return scopes
+
+
+def scope_bindings(tree: ast.AST) -> dict[ast.AST, set[str]]:
+    """
+    The builtins bound in each scope of a tree, by assignment, deletion,
+    import, definition, parameter, exception handler, or match pattern.
+    ``global`` statements bind names in the module.
+    """
+    parents = {
+        child: parent
+        for parent in ast.walk(tree)
+        for child in ast.iter_child_nodes(parent)
+    }
+    bindings: dict[ast.AST, set[str]] = {}
+    for node in ast.walk(tree):
+        names: list[str] = []
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names = [node.id]
+        elif isinstance(node, ast.arg):
+            names = [node.arg]
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names = [a.asname or a.name.partition(".")[0] for a in node.names]
+        elif isinstance(
+            node,
+            (
+                ast.AsyncFunctionDef,
+                ast.ClassDef,
+                ast.ExceptHandler,
+                ast.FunctionDef,
+                ast.MatchAs,
+                ast.MatchStar,
+            ),
+        ):
+            names = [node.name] if node.name is not None else []
+        elif isinstance(node, ast.MatchMapping) and node.rest is not None:
+            names = [node.rest]
+        elif isinstance(node, ast.Global):
+            bindings.setdefault(tree, set()).update(node.names)
+        if names:
+            scope = evaluating_scopes(node, parents)[0]
+            bindings.setdefault(scope, set()).update(names)
+    return bindings
+
+
+def is_rebound(
+    name: str, scopes: list[ast.AST], bindings: dict[ast.AST, set[str]]
+) -> bool:
+    for i, scope in enumerate(scopes):
+        # Class bodies are not visible from the scopes nested within them.
+        if i > 0 and isinstance(scope, ast.ClassDef):
+            continue
+        if name in bindings.get(scope, ()):
+            return True
+    return False
@@ -0,0 +1,233 @@
+"""
+Differential tests comparing ComprehensionChecker against the unoptimized rule
+engine in reference_checker.py, on random snippets and mutations of the rule
+tests' cases. The snippets are biased towards the shapes the rules inspect, so
+that optimizations to the engine can't quietly change results.
+"""
+
+from __future__ import annotations
+
+import ast
+import random
+
+import pytest
+
+from flake8_comprehensions import ComprehensionChecker
+from tests.reference_checker import ReferenceChecker
+from tests.test_flake8_comprehensions import rule_cases
+
+builtins = [
+    "all",
+    "any",
+    "dict",
+    "enumerate",
+    "filter",
+    "frozenset",
+    "len",
+    "list",
+    "map",
+    "max",
+    "min",
+    "reversed",
+    "set",
+    "sorted",
+    "sum",
+    "tuple",
+]
+
+names = ["a", "b", "x", "y", "items"]
+
+
+def results(
+    checker_class: type[ComprehensionChecker | ReferenceChecker], tree: ast.AST
+) -> list[tuple[int, int, str]]:
+    # Rules newer than the reference's engine are left out of comparisons.
+    return sorted(
+        (line, col, message)
+        for line, col, message, _ in checker_class(tree).run()
+        if message[:4] in ReferenceChecker.messages
+    )
+
+
+def assert_same_results(source: str) -> None:
+    tree = ast.parse(source)
+    expected = results(ReferenceChecker, tree)
+
+    assert results(ComprehensionChecker, tree) == expected, source
+
+
+def random_expr(rng: random.Random, depth: int = 3) -> str:
+    kind = rng.choice(
+        ["name", "literal", "comprehension", "call", "call", "call", "reversal"]
+        if depth > 0
+        else ["name", "literal"]
+    )
+    if kind == "name":
+        return rng.choice(names)
+    elif kind == "literal":
+        elements = ", ".join(rng.choice(names) for _ in range(rng.randrange(3)))
+        return rng.choice(
+            [
+                f"[{elements}]",
+                f"({elements},)" if elements else "()",
+                f"{{{elements}}}" if elements else "{}",
+                "{a: b}",
+                "{a: b, **x}",
+            ]
+        )
+    elif kind == "comprehension":
+        target = rng.choice(["x", "(x, y)", "y"])
+        iterable = random_expr(rng, depth - 1)
+        element = rng.choice(["x", "y", "(x, y)", "f(x)", "x + 1"])
+        condition = rng.choice(["", " if x", " if f(y)"])
+        generators = f"for {target} in {iterable}{condition}"
+        return rng.choice(
+            [
+                f"[{element} {generators}]",
+                f"{{{element} {generators}}}",
+                f"({element} {generators})",
+                f"{{x: {rng.choice(['y', 'None', '1', 'x'])} {generators}}}",
+                f"{{{rng.choice(['x', 'y'])}: x {generators}}}",
+            ]
+        )
+    elif kind == "reversal":
+        return f"{random_expr(rng, depth - 1)}[::-1]"
+
+    func = rng.choice(builtins)
+    args = [random_expr(rng, depth - 1) for _ in range(rng.choice([0, 1, 1, 1, 2]))]
+    if func == "map" and rng.random() < 0.7:
+        args.insert(0, rng.choice(["lambda x: x + 1", "lambda x, y: x", "f"]))
+    if rng.random() < 0.1:
+        args.append(f"*{rng.choice(names)}")
+    if rng.random() < 0.3:
+        args.append(rng.choice(["reverse=True", "reverse=False", "reverse=a"]))
+    if rng.random() < 0.2:
+        args.append(rng.choice(["key=len", "key=lambda x: -x", "a=1", "**x"]))
+    return f"{func}({', '.join(args)})"
+
+
+def random_statement(rng: random.Random, depth: int = 2) -> list[str]:
+    kind = rng.choice(
+        ["assign", "assign", "annotated", "rebind", "function", "class", "for"]
+        if depth > 0
+        else ["assign", "annotated", "rebind"]
+    )
+    if kind == "assign":
+        return [f"{rng.choice(names)} = {random_expr(rng)}"]
+    elif kind == "annotated":
+        name = rng.choice(names)
+        annotation = rng.choice(
+            ["list[int]", "dict[str, int]", "set[str]", "tuple[int, ...]", "int"]
+        )
+        func = rng.choice(["dict", "list", "set", "tuple"])
+        return [f"{name}: {annotation} = {random_expr(rng)}", f"{func}({name})"]
+    elif kind == "rebind":
+        name = rng.choice(builtins)
+        return [
+            rng.choice(
+                [
+                    f"{name} = {rng.choice(names)}",
+                    f"from lib import {name}",
+                    f"import {name}",
+                    f"global {name}",
+                    f"del {name}",
+                ]
+            )
+        ]
+
+    body = [
+        "    " + line
+        for _ in range(rng.randint(1, 3))
+        for line in random_statement(rng, depth - 1)
+    ]
+    if kind == "function":
+        param = rng.choice(
+            [
+                "x",
+                f"{rng.choice(names)}: list[int]",
+                rng.choice(builtins),
+                f"x={random_expr(rng, 1)}",
+            ]
+        )
+        return [f"def f({param}):", *body, f"    return {random_expr(rng)}"]
+    elif kind == "class":
+        return ["class C:", *body]
+    else:
+        return [f"for x in {random_expr(rng)}:", *body]
+
+
+def random_module(rng: random.Random) -> str:
+    return "\n".join(
+        line for _ in range(rng.randint(1, 6)) for line in random_statement(rng)
+    )
+
+
+class Mutator(ast.NodeTransformer):
+    """
+    Randomly rename builtin calls, change comprehension types, and flip
+    constants, so that rule cases turn into near misses of other rules.
+    """
+
+    def __init__(self, rng: random.Random) -> None:
+        self.rng = rng
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.func, ast.Name) and self.rng.random() < 0.3:
+            node.func.id = self.rng.choice(builtins)
+        if node.args and self.rng.random() < 0.1:
+            node.args.pop()
+        return node
+
+    def visit_ListComp(self, node: ast.ListComp) -> ast.AST:
+        return self.change_comprehension(node)
+
+    def visit_SetComp(self, node: ast.SetComp) -> ast.AST:
+        return self.change_comprehension(node)
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp) -> ast.AST:
+        return self.change_comprehension(node)
+
+    def change_comprehension(
+        self, node: ast.ListComp | ast.SetComp | ast.GeneratorExp
+    ) -> ast.AST:
+        self.generic_visit(node)
+        if self.rng.random() < 0.3:
+            node_type = self.rng.choice([ast.ListComp, ast.SetComp, ast.GeneratorExp])
+            return ast.copy_location(
+                node_type(elt=node.elt, generators=node.generators), node
+            )
+        return node
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if isinstance(node.value, bool) and self.rng.random() < 0.5:
+            return ast.copy_location(ast.Constant(value=not node.value), node)
+        return node
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_snippets(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        assert_same_results(random_module(rng))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mutated_rule_cases(seed):
+    rng = random.Random(seed)
+    for source, _ in rule_cases():
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            continue
+        mutated = ast.fix_missing_locations(Mutator(rng).visit(tree))
+        assert_same_results(ast.unparse(mutated))
+
+
+def test_rule_cases():
+    for source, _ in rule_cases():
+        try:
+            ast.parse(source)
+        except SyntaxError:
+            continue
+        assert_same_results(source)
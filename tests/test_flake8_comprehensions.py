@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import re
+import subprocess
+import sys
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
 from importlib.metadata import version
 from textwrap import dedent
+from typing import Any
 
 import pytest
 
+from flake8_comprehensions import ComprehensionChecker, check_sources
+
 
 @pytest.fixture
 def flake8_path(flake8_path):
@@ -27,6 +34,25 @@ def test_version(flake8_path):
     assert re.search(version_regex, unwrapped)
 
 
+def test_version_attribute():
+    assert ComprehensionChecker.version == version("flake8-comprehensions")
+
+
+def test_import_is_lightweight():
+    # Flake8 imports every plugin on startup, so the import should not pull
+    # in slow modules. -X importtime lists each module imported.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import flake8_comprehensions"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    imported = {line.rpartition("|")[2].strip() for line in result.stderr.splitlines()}
+    assert "flake8_comprehensions" in imported
+    assert imported.isdisjoint({"importlib.metadata", "typing"})
+
+
 @pytest.mark.parametrize(
     "code",
     [
@@ -596,6 +622,35 @@ def test_C413_pass(code, flake8_path):
                 + " - toggle reverse argument to sorted()."
             ],
         ),
+        (
+            "list(sorted(list(tuple(a))))",
+            [
+                "./example.py:1:1: C413 Unnecessary list call around sorted()"
+                + " - rewrite as sorted(a)."
+            ],
+        ),
+        (
+            "reversed(sorted(list(a), key=f))",
+            [
+                "./example.py:1:1: C413 Unnecessary reversed call around sorted()"
+                + " - rewrite as sorted(a, key=f, reverse=True)."
+            ],
+        ),
+        (
+            "reversed(sorted(tuple(a), reverse=True))",
+            [
+                "./example.py:1:1: C413 Unnecessary reversed call around sorted()"
+                + " - rewrite as sorted(a)."
+            ],
+        ),
+        (
+            "reversed(sorted(list(a), reverse=flag))",
+            [
+                "./example.py:1:1: C413 Unnecessary reversed call around sorted()"
+                + " - toggle reverse argument to sorted().",
+                "./example.py:1:10: C414 Unnecessary list call within sorted().",
+            ],
+        ),
     ],
 )
 def test_C413_fail(code, failures, flake8_path):
@@ -690,6 +745,55 @@ def test_C414_pass(code, flake8_path):
             "sorted(reversed(a), reverse=True)",
             ["./example.py:1:1: C414 Unnecessary reversed call within sorted()."],
         ),
+        (
+            "sorted(list(tuple(a)))",
+            [
+                "./example.py:1:1: C414 Unnecessary list call within sorted() - "
+                + "rewrite as sorted(a)."
+            ],
+        ),
+        (
+            "set(list(set(sorted(a, key=f))))",
+            [
+                "./example.py:1:1: C414 Unnecessary list call within set() - "
+                + "rewrite as set(a)."
+            ],
+        ),
+        (
+            "sorted(tuple(list(a)), key=f, reverse=True)",
+            [
+                "./example.py:1:1: C414 Unnecessary tuple call within sorted() - "
+                + "rewrite as sorted(a, key=f, reverse=True)."
+            ],
+        ),
+        (
+            "list(tuple(sorted(a)))",
+            [
+                "./example.py:1:1: C414 Unnecessary tuple call within list() - "
+                + "rewrite as sorted(a)."
+            ],
+        ),
+        (
+            "tuple(list(tuple(x for x in a)))",
+            [
+                "./example.py:1:1: C414 Unnecessary list call within tuple() - "
+                + "rewrite as tuple(x for x in a)."
+            ],
+        ),
+        (
+            "sorted(list(tuple(list(x for x in a))))",
+            [
+                "./example.py:1:1: C414 Unnecessary list call within sorted() - "
+                + "rewrite as sorted(x for x in a)."
+            ],
+        ),
+        (
+            "list(tuple(set(list(a))))",
+            [
+                "./example.py:1:1: C414 Unnecessary tuple call within list().",
+                "./example.py:1:12: C414 Unnecessary list call within set().",
+            ],
+        ),
     ],
 )
 def test_C414_fail(code, failures, flake8_path):
@@ -758,10 +862,10 @@ def test_C415_fail(code, failures, flake8_path):
         "{y: x for x, y in zip('abc', '123')}",
         "{x: y for x, (y,) in zip('a', ('1',))}",
         "{x: z for x, (y,), z in zip('a', ('1',), 'b')}",
-        "[str(x) for x in range(5)]",
+        "foo = [str(x) for x in range(5)]",
         "[x + 1 for x in range(5)]",
         "[x for x in range(5) if x % 2]",
-        "{str(x) for x in range(5)}",
+        "foo = {str(x) for x in range(5)}",
         "{x + 1 for x in range(5)}",
         "{x for x in range(5) if x % 2}",
         """\
@@ -930,7 +1034,7 @@ def test_C418_fail(code, failures, flake8_path):
 @pytest.mark.parametrize(
     "code",
     [
-        "any(num == 3 for num in range(5))",
+        "any(num > 3 for num in range(5))",
         "all(num == 3 for num in range(5))",
     ],
 )
@@ -971,8 +1075,8 @@ def test_C419_fail(code, failures, flake8_path):
         "{elt: elt * 2 for elt in range(5)}",
         "{elt: [] for elt in foo}",
         "{elt: {1, 2, 3} for elt in ['a', 'b', 'c']}",
-        "{elt: some_func() for elt in ['a', 'b', 'c']}",
-        "{elt: SomeClass() for elt in ['a', 'b', 'c']}",
+        "foo = {elt: some_func() for elt in ['a', 'b', 'c']}",
+        "foo = {elt: SomeClass() for elt in ['a', 'b', 'c']}",
     ],
 )
 def test_C420_pass(code, flake8_path):
@@ -1018,3 +1122,1387 @@ def test_C420_fail(code, failures, flake8_path):
     (flake8_path / "example.py").write_text(dedent(code))
     result = flake8_path.run_flake8()
     assert result.out_lines == failures
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        """\
+        list = MyList
+        foo = list(x + 1 for x in range(10))
+        """,
+        """\
+        def foo():
+            return set(list(a))
+
+        from mylib import list
+        """,
+        """\
+        def foo():
+            dict = OrderedDict
+            return dict([(x, x) for x in range(10)])
+        """,
+        """\
+        def foo(sorted):
+            return sorted(list(a))
+        """,
+        """\
+        def foo():
+            return lambda map: list(map(lambda x: x, y))
+        """,
+        """\
+        import tuple.submodule
+
+        foo = tuple([1, 2])
+        """,
+        """\
+        for set in sets:
+            set(x for x in y)
+        """,
+        """\
+        try:
+            pass
+        except Exception as list:
+            list(x for x in y)
+        """,
+        """\
+        def foo():
+            global list
+            list = MyList
+
+        def bar():
+            return list(x for x in y)
+        """,
+    ],
+)
+def test_shadowed_builtin_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            """\
+            def foo():
+                list = MyList
+
+            def bar():
+                return list(x for x in y)
+            """,
+            [
+                "./example.py:5:12: C400 Unnecessary generator - rewrite as a list "
+                + "comprehension."
+            ],
+        ),
+        (
+            """\
+            class Foo:
+                set = frozenset
+
+                def bar(self):
+                    return set(x for x in y)
+            """,
+            [
+                "./example.py:5:16: C401 Unnecessary generator - rewrite as a set "
+                + "comprehension."
+            ],
+        ),
+        (
+            """\
+            foo = [list(x for x in y) for list in z]
+            bar = list(x for x in y)
+            """,
+            [
+                "./example.py:2:7: C400 Unnecessary generator - rewrite as a list "
+                + "comprehension."
+            ],
+        ),
+        (
+            """\
+            from mylib import tuple
+
+            foo = sorted(list(tuple(a)))
+            """,
+            ["./example.py:3:7: C414 Unnecessary list call within sorted()."],
+        ),
+        (
+            """\
+            def foo():
+                return list(sorted(tuple(set(a))))
+
+            from mylib import list
+            """,
+            ["./example.py:2:17: C414 Unnecessary tuple call within sorted()."],
+        ),
+        (
+            """\
+            from mylib import set
+
+            foo = sorted(tuple(list(map(lambda x: x + 1, a))))
+            """,
+            [
+                "./example.py:3:7: C414 Unnecessary tuple call within sorted() - "
+                + "rewrite as sorted(map(lambda x: x + 1, a)).",
+                "./example.py:3:25: C417 Unnecessary use of map - use a generator "
+                + "expression instead.",
+            ],
+        ),
+        (
+            """\
+            from mylib import tuple
+
+            foo = sorted(tuple(list(map(lambda x: x + 1, a))))
+            """,
+            [
+                "./example.py:3:20: C417 Unnecessary use of map - use a list "
+                + "comprehension instead.",
+            ],
+        ),
+        (
+            """\
+            from mylib import list
+
+            foo = sorted(list(x), key=lambda r: r[0])
+            """,
+            [
+                "./example.py:3:27: C430 Unnecessary lambda - rewrite as "
+                + "operator.itemgetter(0).",
+            ],
+        ),
+        (
+            """\
+            from mylib import tuple
+
+            foo = sum(tuple(x), [])
+            """,
+            [
+                "./example.py:3:7: C427 Unnecessary quadratic concatenation with "
+                + "sum() - flatten with itertools.chain.from_iterable() or a "
+                + "nested comprehension.",
+            ],
+        ),
+        (
+            """\
+            from mylib import len
+
+            foo = sorted(len(x), key=lambda r: r.a)
+            """,
+            [
+                "./example.py:3:26: C430 Unnecessary lambda - rewrite as "
+                + "operator.attrgetter('a').",
+            ],
+        ),
+        (
+            """\
+            from mylib import list
+
+            foo = [x for x in list(range(3))]
+            """,
+            [
+                "./example.py:3:7: C416 Unnecessary list comprehension - rewrite "
+                + "using list().",
+            ],
+        ),
+    ],
+)
+def test_shadowed_builtin_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        """\
+        def foo(items):
+            return list(items)
+        """,
+        """\
+        def foo(items: Sequence[int]):
+            return list(items)
+        """,
+        """\
+        def foo(items: list[int]):
+            return tuple(items)
+        """,
+        """\
+        def foo(items: list[int]):
+            return list(items, 1)
+        """,
+        """\
+        def foo(items: list[int]):
+            def bar(items):
+                return list(items)
+        """,
+        """\
+        def foo(items: list[int]):
+            return [list(items) for items in items]
+        """,
+        """\
+        items: list[int] = []
+
+        def foo():
+            return list(items)
+        """,
+        """\
+        def foo(items: "list[int]"):
+            return list(items)
+        """,
+    ],
+)
+def test_C421_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            """\
+            def foo(items: list[int]):
+                return list(items)
+            """,
+            [
+                "./example.py:2:12: C421 Unnecessary list call - items is already "
+                + "annotated as a list."
+            ],
+        ),
+        (
+            """\
+            def foo(mapping: typing.Dict[str, int]):
+                for key in keys:
+                    print(dict(mapping))
+            """,
+            [
+                "./example.py:3:15: C421 Unnecessary dict call - mapping is already "
+                + "annotated as a dict."
+            ],
+        ),
+        (
+            """\
+            def foo():
+                items: Set[int] = get_items()
+                return [set(items) for _ in range(10)]
+            """,
+            [
+                "./example.py:3:13: C421 Unnecessary set call - items is already "
+                + "annotated as a set."
+            ],
+        ),
+        (
+            """\
+            values: tuple[int, ...] = (1, 2)
+            foo = tuple(values)
+            """,
+            [
+                "./example.py:2:7: C421 Unnecessary tuple call - values is already "
+                + "annotated as a tuple."
+            ],
+        ),
+    ],
+)
+def test_C421_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+def test_C421_off_by_default(flake8_path):
+    (flake8_path / "setup.cfg").write_text("[flake8]\n")
+    (flake8_path / "example.py").write_text(
+        dedent(
+            """\
+            def foo(items: list[int]) -> list[int]:
+                return list(items)
+            """
+        )
+    )
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+    result = flake8_path.run_flake8(["--extend-select", "C421"])
+    assert result.out_lines == [
+        "./example.py:2:12: C421 Unnecessary list call - items is already "
+        + "annotated as a list."
+    ]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "async def foo():\n    return [fetch(x) for x in ids]",
+        "async def foo():\n    return [await fut for fut in futures]",
+        "async def foo():\n    return [await fetch(await get(x)) for x in ids]",
+        "async def foo():\n    return [await fetch(y := x) for x in ids]",
+        "async def foo():\n    return {await fetch(x): x for x in ids}",
+        """\
+        async def foo():
+            for x in ids:
+                results.append(await fetch(x, results))
+        """,
+        """\
+        async def foo():
+            for x in ids:
+                results.append(await fetch(x))
+                log(x)
+        """,
+        """\
+        async def foo():
+            for x in ids:
+                results.append(await x)
+        """,
+        """\
+        async def foo():
+            for x in ids:
+                results.append(fetch(x))
+            else:
+                pass
+        """,
+    ],
+)
+def test_C422_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            "async def foo():\n    return [await fetch(x) for x in ids]",
+            [
+                "./example.py:2:12: C422 Unnecessary sequential await in list "
+                + "comprehension - run the calls concurrently with "
+                + "asyncio.gather() or a TaskGroup."
+            ],
+        ),
+        (
+            "async def foo():\n    return {await fetch(x) for x in ids if x}",
+            [
+                "./example.py:2:12: C422 Unnecessary sequential await in set "
+                + "comprehension - run the calls concurrently with "
+                + "asyncio.gather() or a TaskGroup."
+            ],
+        ),
+        (
+            "async def foo():\n    return {x: await fetch(x) for x in ids}",
+            [
+                "./example.py:2:12: C422 Unnecessary sequential await in dict "
+                + "comprehension - run the calls concurrently with "
+                + "asyncio.gather() or a TaskGroup."
+            ],
+        ),
+        (
+            """\
+            async def foo():
+                results = []
+                for x in ids:
+                    results.append(await fetch(x))
+                return results
+            """,
+            [
+                "./example.py:3:5: C422 Unnecessary sequential await in for loop "
+                + "- run the calls concurrently with asyncio.gather() or a "
+                + "TaskGroup."
+            ],
+        ),
+        (
+            "async def foo():\n    return [await fetch(x) async for x in aiter]",
+            [
+                "./example.py:2:12: C422 Unnecessary sequential await in list "
+                + "comprehension - run the calls concurrently with "
+                + "asyncio.gather() or a TaskGroup."
+            ],
+        ),
+        (
+            """\
+            async def foo():
+                async for x in ids:
+                    results.append(await fetch(x))
+            """,
+            [
+                "./example.py:2:5: C422 Unnecessary sequential await in for loop "
+                + "- run the calls concurrently with asyncio.gather() or a "
+                + "TaskGroup."
+            ],
+        ),
+    ],
+)
+def test_C422_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+def test_C422_off_by_default(flake8_path):
+    (flake8_path / "setup.cfg").write_text("[flake8]\n")
+    (flake8_path / "example.py").write_text(
+        "async def foo(fetch, ids):\n    return [await fetch(x) for x in ids]\n"
+    )
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+    result = flake8_path.run_flake8(["--extend-select", "C422"])
+    assert result.out_lines == [
+        "./example.py:2:12: C422 Unnecessary sequential await in list "
+        + "comprehension - run the calls concurrently with asyncio.gather() or "
+        + "a TaskGroup."
+    ]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "sum(x * 2 for x in range(5))",
+        "sum({x + 1 for x in range(5)})",
+        "max([x + 1 for x in range(5)], [1])",
+        "mean([x + 1 for x in range(5)])",
+        "from numpy import sum\nsum([x + 1 for x in range(5)])",
+    ],
+)
+def test_C423_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            "sum([x + 1 for x in range(5)])",
+            [
+                "./example.py:1:1: C423 Unnecessary list comprehension passed to "
+                + "sum() - rewrite as a generator."
+            ],
+        ),
+        (
+            "max([x + 1 for x in range(5)], default=0)",
+            [
+                "./example.py:1:1: C423 Unnecessary list comprehension passed to "
+                + "max() - rewrite as a generator."
+            ],
+        ),
+        (
+            "sorted([x + 1 for x in range(5)], reverse=True)",
+            [
+                "./example.py:1:1: C423 Unnecessary list comprehension passed to "
+                + "sorted() - rewrite as a generator."
+            ],
+        ),
+        (
+            "frozenset([x + 1 for x in range(5)])",
+            [
+                "./example.py:1:1: C423 Unnecessary list comprehension passed to "
+                + "frozenset() - rewrite as a generator."
+            ],
+        ),
+    ],
+)
+def test_C423_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+def test_C423_off_by_default(flake8_path):
+    (flake8_path / "setup.cfg").write_text("[flake8]\n")
+    (flake8_path / "example.py").write_text("sum([x + 1 for x in range(5)])\n")
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+    result = flake8_path.run_flake8(["--extend-select", "C423"])
+    assert result.out_lines == [
+        "./example.py:1:1: C423 Unnecessary list comprehension passed to sum() - "
+        + "rewrite as a generator."
+    ]
+
+
+def test_C423_comprehension_reducers(flake8_path):
+    (flake8_path / "setup.cfg").write_text(
+        dedent(
+            """\
+            [flake8]
+            select = C4
+            comprehension-reducers = sum, mean
+            """
+        )
+    )
+    (flake8_path / "example.py").write_text(
+        dedent(
+            """\
+            from statistics import mean
+            sum([x + 1 for x in range(5)])
+            max([x + 1 for x in range(5)])
+            mean([x + 1 for x in range(5)])
+            """
+        )
+    )
+    result = flake8_path.run_flake8()
+    assert result.out_lines == [
+        "./example.py:2:1: C423 Unnecessary list comprehension passed to sum() - "
+        + "rewrite as a generator.",
+        "./example.py:4:1: C423 Unnecessary list comprehension passed to mean() - "
+        + "rewrite as a generator.",
+    ]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "counts = [xs.count(x) for x in ys]",
+        "def foo(xs: set[int]):\n    return [xs.remove(x) for x in ys]",
+        "for x in xs:\n    s.remove(x)",
+        "for x in xs:\n    text.index(x)",
+        "for x in xs:\n    for y in ys:\n        pass\n    xs.count()",
+        "for x in xs:\n    def foo():\n        xs.count(x)",
+        "while q:\n    q.pop()",
+        "while q:\n    q.pop(1)",
+        "while q:\n    q.insert(1, x)",
+        "q.pop(0)",
+    ],
+)
+def test_C424_C425_C426_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            "counts = [xs.count(x) for x in xs]",
+            [
+                "./example.py:1:11: C424 Unnecessary xs.count() call in a loop - "
+                + "count all items once with collections.Counter."
+            ],
+        ),
+        (
+            """\
+            def foo(xs: list[int]):
+                for x in ys:
+                    if xs.count(x) > 1:
+                        pass
+            """,
+            [
+                "./example.py:3:12: C424 Unnecessary xs.count() call in a loop - "
+                + "count all items once with collections.Counter."
+            ],
+        ),
+        (
+            """\
+            def foo(result: list[int]):
+                for x in items:
+                    if x in result:
+                        result.remove(x)
+            """,
+            [
+                "./example.py:4:13: C425 Unnecessary result.remove() call in a "
+                + "loop - look items up in a dict or set."
+            ],
+        ),
+        (
+            "positions = {x: xs.index(x) for x in xs}",
+            [
+                "./example.py:1:17: C425 Unnecessary xs.index() call in a loop - "
+                + "look items up in a dict or set."
+            ],
+        ),
+        (
+            "while q:\n    q.pop(0)",
+            [
+                "./example.py:2:5: C426 Unnecessary q.pop(0) call in a loop - "
+                + "use a collections.deque."
+            ],
+        ),
+        (
+            "for x in xs:\n    out.insert(0, x)",
+            [
+                "./example.py:2:5: C426 Unnecessary out.insert(0) call in a loop - "
+                + "use a collections.deque."
+            ],
+        ),
+        (
+            "firsts = [q.pop(0) for _ in range(3)]",
+            [
+                "./example.py:1:11: C426 Unnecessary q.pop(0) call in a loop - "
+                + "use a collections.deque."
+            ],
+        ),
+    ],
+)
+def test_C424_C425_C426_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+def test_C426_off_by_default(flake8_path):
+    (flake8_path / "setup.cfg").write_text("[flake8]\n")
+    (flake8_path / "example.py").write_text("q = [1]\nwhile q:\n    q.pop(0)\n")
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+    result = flake8_path.run_flake8(["--extend-select", "C426"])
+    assert result.out_lines == [
+        "./example.py:3:5: C426 Unnecessary q.pop(0) call in a loop - use a "
+        + "collections.deque."
+    ]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "sum(lists)",
+        "sum(numbers, 0)",
+        "sum(lists, start)",
+        "reduce(operator.add, lists)",
+        "reduce(operator.mul, lists, [])",
+        "reduce(lambda a, b: b + a, lists, [])",
+        "reduce(lambda a, b: a + b, lists, initial)",
+        "obj.reduce(operator.add, lists, [])",
+        "from mylib import sum\nsum(lists, [])",
+    ],
+)
+def test_C427_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            "sum(lists, [])",
+            [
+                "./example.py:1:1: C427 Unnecessary quadratic concatenation with "
+                + "sum() - flatten with itertools.chain.from_iterable() or a "
+                + "nested comprehension."
+            ],
+        ),
+        (
+            "sum(tuples, start=())",
+            [
+                "./example.py:1:1: C427 Unnecessary quadratic concatenation with "
+                + "sum() - flatten with itertools.chain.from_iterable() or a "
+                + "nested comprehension."
+            ],
+        ),
+        (
+            "functools.reduce(operator.add, lists, [])",
+            [
+                "./example.py:1:1: C427 Unnecessary quadratic concatenation with "
+                + "reduce() - flatten with itertools.chain.from_iterable() or a "
+                + "nested comprehension."
+            ],
+        ),
+        (
+            "reduce(lambda a, b: a + b, lists, [])",
+            [
+                "./example.py:1:1: C427 Unnecessary quadratic concatenation with "
+                + "reduce() - flatten with itertools.chain.from_iterable() or a "
+                + "nested comprehension."
+            ],
+        ),
+        (
+            "reduce(operator.concat, lists)",
+            [
+                "./example.py:1:1: C427 Unnecessary quadratic concatenation with "
+                + "reduce() - flatten with itertools.chain.from_iterable() or a "
+                + "nested comprehension."
+            ],
+        ),
+    ],
+)
+def test_C427_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "[ys[i] for i in range(len(xs))]",
+        "[i * 2 for i in range(len(xs))]",
+        "[xs[i] for i in range(1, len(xs))]",
+        "[xs[i] for i in range(len(xs)) for j in ys]",
+        "[xs[i:] for i in range(len(xs))]",
+        "def foo(range):\n    return [xs[i] for i in range(len(xs))]",
+        "nums = list(range(10))",
+        "for i in list(ys):\n    pass",
+        "from mylib import list\nfor i in list(range(10)):\n    pass",
+    ],
+)
+def test_C428_C429_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            "doubled = [xs[i] * 2 for i in range(len(xs))]",
+            [
+                "./example.py:1:31: C428 Unnecessary range(len(xs)) in "
+                + "comprehension - iterate over xs directly."
+            ],
+        ),
+        (
+            "pairs = {i: xs[i] for i in range(len(xs)) if xs[i]}",
+            [
+                "./example.py:1:28: C428 Unnecessary range(len(xs)) in "
+                + "comprehension - use enumerate(xs)."
+            ],
+        ),
+        (
+            "total = sum(xs[i] * ys[i] for i in range(len(xs)))",
+            [
+                "./example.py:1:36: C428 Unnecessary range(len(xs)) in "
+                + "comprehension - use enumerate(xs)."
+            ],
+        ),
+        (
+            "for i in list(range(10)):\n    pass",
+            [
+                "./example.py:1:10: C429 Unnecessary list call around range() - "
+                + "use the range directly."
+            ],
+        ),
+        (
+            "squares = {i * i for i in list(range(1, 10, 2))}",
+            [
+                "./example.py:1:27: C429 Unnecessary list call around range() - "
+                + "use the range directly."
+            ],
+        ),
+        (
+            "size = len(list(range(10)))",
+            [
+                "./example.py:1:12: C429 Unnecessary list call around range() - "
+                + "use the range directly."
+            ],
+        ),
+    ],
+)
+def test_C428_C429_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "sorted(rows, key=lambda r: r[i])",
+        "sorted(rows, key=lambda r: r[0][1])",
+        "sorted(rows, key=lambda r: r[1:])",
+        "sorted(rows, key=lambda r: r.x())",
+        "sorted(rows, key=lambda r: other.x)",
+        "sorted(rows, key=lambda r, s: r[0])",
+        "sorted(rows, key=lambda *r: r[0])",
+        "sort(rows, key=lambda r: r[0])",
+        "obj.merge(rows, key=lambda r: r[0])",
+        "dict(map(lambda r: r.pair(), rows))",
+        "def foo(sorted):\n    return sorted(rows, key=lambda r: r[0])",
+    ],
+)
+def test_C430_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            "sorted(rows, key=lambda r: r[0])",
+            [
+                "./example.py:1:18: C430 Unnecessary lambda - rewrite as "
+                + "operator.itemgetter(0)."
+            ],
+        ),
+        (
+            "max(objs, key=lambda o: o.score)",
+            [
+                "./example.py:1:15: C430 Unnecessary lambda - rewrite as "
+                + "operator.attrgetter('score')."
+            ],
+        ),
+        (
+            "min(objs, key=lambda o: o.stats.score)",
+            [
+                "./example.py:1:15: C430 Unnecessary lambda - rewrite as "
+                + "operator.attrgetter('stats.score')."
+            ],
+        ),
+        (
+            'rows.sort(key=lambda r: r["id"])',
+            [
+                "./example.py:1:15: C430 Unnecessary lambda - rewrite as "
+                + "operator.itemgetter('id')."
+            ],
+        ),
+        (
+            "import heapq\nheapq.nlargest(3, rows, key=lambda r: r[-1])",
+            [
+                "./example.py:2:29: C430 Unnecessary lambda - rewrite as "
+                + "operator.itemgetter(-1)."
+            ],
+        ),
+        (
+            "from heapq import merge\nmerge(a, b, key=lambda r: r.x)",
+            [
+                "./example.py:2:17: C430 Unnecessary lambda - rewrite as "
+                + "operator.attrgetter('x')."
+            ],
+        ),
+        (
+            "dict(map(lambda r: r[0], rows))",
+            [
+                "./example.py:1:10: C430 Unnecessary lambda - rewrite as "
+                + "operator.itemgetter(0)."
+            ],
+        ),
+        (
+            "list(sorted(rows, key=lambda r: r[0]))",
+            [
+                "./example.py:1:1: C413 Unnecessary list call around sorted().",
+                "./example.py:1:23: C430 Unnecessary lambda - rewrite as "
+                + "operator.itemgetter(0).",
+            ],
+        ),
+    ],
+)
+def test_C430_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "all(x == t for x in xs)",
+        "any(x != t for x in xs)",
+        "any(x < t for x in xs)",
+        "any(x == f() for x in xs)",
+        "any(x.y == t for x in xs)",
+        "any(x == x for x in xs)",
+        "any(x == t for x in xs if x)",
+        "any(x == y for x in xs for y in ys)",
+        "any(a == t for a, b in xs)",
+        "any(x == t == u for x in xs)",
+        "any(t in x for x in xs)",
+        "def foo(any):\n    return any(x == t for x in xs)",
+    ],
+)
+def test_C431_C432_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            "any(x == target for x in xs)",
+            [
+                "./example.py:1:1: C431 Unnecessary generator passed to any() - "
+                + "rewrite as target in xs."
+            ],
+        ),
+        (
+            "any(0 == x for x in (a if b else c))",
+            [
+                "./example.py:1:1: C431 Unnecessary generator passed to any() - "
+                + "rewrite as 0 in (a if b else c)."
+            ],
+        ),
+        (
+            "all(x != self.target for x in xs)",
+            [
+                "./example.py:1:1: C431 Unnecessary generator passed to all() - "
+                + "rewrite as self.target not in xs."
+            ],
+        ),
+        (
+            "all(x in allowed for x in items)",
+            [
+                "./example.py:1:1: C432 Unnecessary generator passed to all() - "
+                + "rewrite as set(items).issubset(allowed)."
+            ],
+        ),
+        (
+            "any(x in allowed for x in items)",
+            [
+                "./example.py:1:1: C432 Unnecessary generator passed to any() - "
+                + "rewrite as not set(items).isdisjoint(allowed)."
+            ],
+        ),
+        (
+            "all(x not in banned for x in items)",
+            [
+                "./example.py:1:1: C432 Unnecessary generator passed to all() - "
+                + "rewrite as set(items).isdisjoint(banned)."
+            ],
+        ),
+        (
+            "any(x not in allowed for x in items)",
+            [
+                "./example.py:1:1: C432 Unnecessary generator passed to any() - "
+                + "rewrite as not set(items).issubset(allowed)."
+            ],
+        ),
+    ],
+)
+def test_C431_C432_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+def test_C432_off_by_default(flake8_path):
+    (flake8_path / "setup.cfg").write_text("[flake8]\n")
+    (flake8_path / "example.py").write_text("xs = ys = ()\nall(x in ys for x in xs)\n")
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+    result = flake8_path.run_flake8(["--extend-select", "C432"])
+    assert result.out_lines == [
+        "./example.py:2:1: C432 Unnecessary generator passed to all() - "
+        + "rewrite as set(xs).issubset(ys)."
+    ]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "ys = [f(x) for x in xs]",
+        "f([g(x) for x in xs])",
+        "(f(x) for x in xs)",
+        "[x + 1 for x in xs]",
+        "{k: v + 1 for k, v in pairs}",
+        "def foo():\n    return {f(x) for x in xs}",
+        "for x in xs:\n    f(x)",
+    ],
+)
+def test_C433_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            "[print(x) for x in xs]",
+            [
+                "./example.py:1:1: C433 Unnecessary list comprehension - its "
+                + "result is unused, rewrite as a for loop."
+            ],
+        ),
+        (
+            "{cache.pop(k) for k in stale}",
+            [
+                "./example.py:1:1: C433 Unnecessary set comprehension - its "
+                + "result is unused, rewrite as a for loop."
+            ],
+        ),
+        (
+            "def foo():\n    {k: f(k) for k in ks}",
+            [
+                "./example.py:2:5: C433 Unnecessary dict comprehension - its "
+                + "result is unused, rewrite as a for loop."
+            ],
+        ),
+    ],
+)
+def test_C433_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "sum(x for x in xs if x)",
+        "sum(x + 1 for x in xs)",
+        "sum(x for x, y in xs)",
+        "sum(x for y in ys for x in y)",
+        "sum((x for x in xs), 10)",
+        "tuple((x, y) for x, y in xs)",
+        "def foo(sum):\n    return sum(x for x in xs)",
+    ],
+)
+def test_C434_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            "sum(x for x in xs)",
+            [
+                "./example.py:1:1: C434 Unnecessary generator passed to sum() - "
+                + "pass the iterable directly."
+            ],
+        ),
+        (
+            "max((v for v in values), default=0)",
+            [
+                "./example.py:1:1: C434 Unnecessary generator passed to max() - "
+                + "pass the iterable directly."
+            ],
+        ),
+        (
+            "tuple(x for x in xs)",
+            [
+                "./example.py:1:1: C434 Unnecessary generator passed to tuple() - "
+                + "pass the iterable directly."
+            ],
+        ),
+        (
+            "sorted(k for k in keys)",
+            [
+                "./example.py:1:1: C434 Unnecessary generator passed to sorted() - "
+                + "pass the iterable directly."
+            ],
+        ),
+    ],
+)
+def test_C434_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        """\
+        if k not in d:
+            d[k] = compute()
+        """,
+        """\
+        if k not in d:
+            d[k] = []
+        else:
+            d[k].append(v)
+        """,
+        """\
+        if k not in d:
+            e[k] = []
+        """,
+        """\
+        if k in d:
+            v = d[k]
+        """,
+        """\
+        if k in d:
+            v = d[k]
+        else:
+            v = compute()
+        """,
+        """\
+        if k in d:
+            v = d[k]
+        else:
+            w = None
+        """,
+        """\
+        if f(k) in d:
+            v = d[f(k)]
+        else:
+            v = None
+        """,
+        "v = d[k] if k in d else compute()",
+        "v = d[j] if k in d else None",
+        """\
+        class MyMapping(Mapping):
+            def get(self, key, default=None):
+                return self[key] if key in self else default
+        """,
+    ],
+)
+def test_C435_C436_pass(code, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == []
+
+
+@pytest.mark.parametrize(
+    "code,failures",
+    [
+        (
+            """\
+            if k not in d:
+                d[k] = []
+            d[k].append(v)
+            """,
+            [
+                "./example.py:1:1: C435 Unnecessary double lookup in d - use "
+                + "d.setdefault() or a collections.defaultdict."
+            ],
+        ),
+        (
+            """\
+            def add(self, key):
+                if key not in self.counts:
+                    self.counts[key] = 0
+                self.counts[key] += 1
+            """,
+            [
+                "./example.py:2:5: C435 Unnecessary double lookup in self.counts - "
+                + "use self.counts.setdefault() or a collections.defaultdict."
+            ],
+        ),
+        (
+            """\
+            if k in d:
+                v = d[k]
+            else:
+                v = None
+            """,
+            [
+                "./example.py:1:1: C436 Unnecessary double lookup in d - use "
+                + "d.get()."
+            ],
+        ),
+        (
+            "v = d[k] if k in d else 0",
+            [
+                "./example.py:1:5: C436 Unnecessary double lookup in d - use "
+                + "d.get()."
+            ],
+        ),
+        (
+            "v = [] if k not in d else d[k]",
+            [
+                "./example.py:1:5: C436 Unnecessary double lookup in d - use "
+                + "d.get()."
+            ],
+        ),
+    ],
+)
+def test_C435_C436_fail(code, failures, flake8_path):
+    (flake8_path / "example.py").write_text(dedent(code))
+    result = flake8_path.run_flake8()
+    assert result.out_lines == failures
+
+
+def test_check_sources():
+    sources: list[tuple[str, bytes | str]] = [
+        ("a.py", b"foo = list()\nbar = set(x for x in y)\n"),
+        ("b.py", "baz = [x + 1 for x in y]\n"),
+        ("c.py", "qux = dict()\n"),
+    ]
+
+    assert list(check_sources(sources)) == [
+        ("a.py", 1, 6, "C408 Unnecessary list call - rewrite as a literal."),
+        (
+            "a.py",
+            2,
+            6,
+            "C401 Unnecessary generator - rewrite as a set comprehension.",
+        ),
+        ("c.py", 1, 6, "C408 Unnecessary dict call - rewrite as a literal."),
+    ]
+
+
+def test_check_sources_syntax_error():
+    sources = [("a.py", b"foo = (\n"), ("b.py", b"foo = \x00\n")]
+    # Python 3.10 raises ValueError for null bytes, rather than SyntaxError.
+    null_error = "SyntaxError" if sys.version_info >= (3, 11) else "ValueError"
+
+    assert list(check_sources(sources)) == [
+        ("a.py", 1, 6, "E999 SyntaxError: '(' was never closed"),
+        (
+            "b.py",
+            1,
+            0,
+            f"E999 {null_error}: source code string cannot contain null bytes",
+        ),
+    ]
+
+
+def test_check_sources_opt_in_codes():
+    sources = [("a.py", "foo = sum([f(x) for x in y])\nbar = list()\n")]
+
+    assert [r[3][:4] for r in check_sources(sources)] == ["C408"]
+    assert [r[3][:4] for r in check_sources(sources, select=["C4"])] == [
+        "C423",
+        "C408",
+    ]
+    assert [r[3][:4] for r in check_sources(sources, extend_select=["C423"])] == [
+        "C423",
+        "C408",
+    ]
+    assert [r[3][:4] for r in check_sources(sources, select=["C423"])] == ["C423"]
+
+
+def test_check_sources_noqa():
+    source = dedent(
+        """\
+        a = list()  # noqa
+        b = list()  # noqa: C408
+        c = list()  # noqa:C401,C408
+        d = list()  # noqa: C4
+        e = list()  # noqa: C401
+        f = list()
+        g = str(list()) + \"\"\"
+        \"\"\"  # noqa
+        """
+    )
+
+    results = check_sources([("a.py", source)])
+
+    assert [line for _, line, _, _ in results] == [5, 6]
+    assert len(list(check_sources([("a.py", source)], disable_noqa=True))) == 7
+
+
+def test_check_sources_noqa_file():
+    source = "# flake8: noqa\nfoo = list()\n"
+
+    assert list(check_sources([("a.py", source)])) == []
+
+
+def test_check_sources_workers():
+    def sources() -> Generator[tuple[str, str]]:
+        for i in range(50):
+            yield f"{i}.py", "foo = list()\n" * (i % 3)
+
+    results = list(check_sources(sources(), workers=2, batch_size=4))
+
+    assert results == list(check_sources(sources()))
+    assert len(results) == 17 * 1 + 16 * 2
+
+
+def test_check_sources_threads():
+    sources = [(f"{i}.py", "foo = list()\n" * (i % 3)) for i in range(50)]
+
+    results = list(check_sources(sources, workers=4, batch_size=4, threads=True))
+
+    assert results == list(check_sources(sources))
+
+
+def rule_cases() -> list[tuple[str, list[str]]]:
+    """
+    Every (code, failures) case from the parametrized rule tests above.
+    """
+    cases: list[tuple[str, list[str]]] = []
+    for name, func in list(globals().items()):
+        match = re.fullmatch(r"test_\w+_(pass|fail)", name)
+        if match is None:
+            continue
+        (mark,) = (m for m in func.pytestmark if m.name == "parametrize")
+        for value in mark.args[1]:
+            if match[1] == "pass":
+                cases.append((dedent(value), []))
+            else:
+                cases.append((dedent(value[0]), value[1]))
+    assert len(cases) > 100
+    return cases
+
+
+def check_case(case: tuple[str, list[str]], **kwargs: Any) -> bool:
+    code, failures = case
+    # Match the select = C4 setting of the Flake8 tests.
+    results = [
+        f"./example.py:{line}:{col + 1}: {message}"
+        for _, line, col, message in check_sources(
+            [("./example.py", code)], select=["C4"], **kwargs
+        )
+    ]
+    return results == failures
+
+
+def test_rules_concurrently():
+    # Run every case from the rule tests above at once in a thread pool, to
+    # check the checker is thread-safe, notably on free-threaded builds.
+    cases = rule_cases()
+
+    with ThreadPoolExecutor(8) as executor:
+        outcomes = list(executor.map(check_case, cases * 4))
+
+    assert [case for case, ok in zip(cases * 4, outcomes) if not ok] == []
+
+
+def test_rules_large_file():
+    cases = rule_cases()
+
+    assert [case for case in cases if not check_case(case, large_file_bytes=0)] == []
+
+
+def test_check_sources_large_file():
+    source = dedent(
+        """\
+        # -*- coding: utf-8 -*-
+        @decorator
+        @decorator(
+            list(x for x in y),
+        )
+        def foo():
+            return list(x for x in y)
+        if foo:
+            bar = set(x for x in y)
+        elif bar:
+            pass
+        else:
+            baz = dict()
+        try:
+            pass
+        except Exception:
+            sorted(list(tuple(a)))
+        finally:
+            tuple(x for x in y); list([1])
+        \"\"\"
+        list(x for x in y)
+        \"\"\"
+        qux = [
+            list(x for x in y)
+        ]
+        def later():
+            return set(x for x in y)
+        from mylib import set
+        """
+    ).encode()
+
+    results = list(check_sources([("a.py", source)], large_file_bytes=0))
+
+    assert results == list(check_sources([("a.py", source)]))
+    assert [(line, col, message[:4]) for _, line, col, message in results] == [
+        (4, 4, "C400"),
+        (7, 11, "C400"),
+        (13, 10, "C408"),
+        (17, 4, "C414"),
+        (19, 4, "C434"),
+        (19, 25, "C410"),
+        (24, 4, "C400"),
+    ]
+
+
+def test_check_sources_large_file_syntax_error():
+    source = b"foo = list()\nbar = (\n"
+
+    assert list(check_sources([("a.py", source)], large_file_bytes=0)) == [
+        ("a.py", 2, 6, "E999 SyntaxError: '(' was never closed"),
+    ]
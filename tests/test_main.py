@@ -0,0 +1,591 @@
+from __future__ import annotations
+
+import argparse
+import ast
+import cProfile
+import json
+import os
+import re
+import subprocess
+import sys
+import tarfile
+import zipfile
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+
+from flake8_comprehensions import ComprehensionChecker
+from flake8_comprehensions._benchmark import rewrites
+from flake8_comprehensions._main import main
+from flake8_comprehensions._notebooks import NotebookChecker
+from flake8_comprehensions._watch import Watcher
+
+
+@pytest.fixture
+def example(tmp_path):
+    path = tmp_path / "example.py"
+    path.write_text(
+        dedent(
+            """\
+            def cold():
+                return set(x for x in range(10))
+
+
+            def hot():
+                return list(x for x in range(10_000))
+
+
+            for _ in range(20):
+                hot()
+            """
+        )
+    )
+    return path
+
+
+def test_main_module(example):
+    result = subprocess.run(
+        [sys.executable, "-m", "flake8_comprehensions", str(example)],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 1
+    assert result.stdout.splitlines() == [
+        f"{example}:2:12: C401 Unnecessary generator - rewrite as a set "
+        + "comprehension.",
+        f"{example}:6:12: C400 Unnecessary generator - rewrite as a list "
+        + "comprehension.",
+    ]
+
+
+def test_main_clean(tmp_path, capsys):
+    (tmp_path / "clean.py").write_text("foo = [x for x in range(10) if x]\n")
+
+    assert main([str(tmp_path)]) == 0
+
+    assert capsys.readouterr().out == ""
+
+
+def test_main_directory(tmp_path, capsys):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "mod.py").write_text("foo = list()\n")
+    (tmp_path / "pkg" / "notes.txt").write_text("foo = list()\n")
+    (tmp_path / ".venv").mkdir()
+    (tmp_path / ".venv" / "mod.py").write_text("foo = list()\n")
+
+    assert main([str(tmp_path)]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        f"{tmp_path / 'pkg' / 'mod.py'}:1:7: C408 Unnecessary list call - "
+        + "rewrite as a literal."
+    ]
+
+
+def test_main_syntax_error(tmp_path, capsys):
+    path = tmp_path / "broken.py"
+    path.write_text("foo = (\n")
+
+    assert main([str(path)]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        f"{path}:1:7: E999 SyntaxError: '(' was never closed"
+    ]
+
+
+def test_main_select(tmp_path, capsys):
+    path = tmp_path / "example.py"
+    path.write_text("foo = sum([f(x) for x in y])\nbar = list()\n")
+
+    assert main([str(path)]) == 1
+    assert [line.split()[1] for line in capsys.readouterr().out.splitlines()] == [
+        "C408"
+    ]
+
+    assert main(["--extend-select", "C423", str(path)]) == 1
+    assert [line.split()[1] for line in capsys.readouterr().out.splitlines()] == [
+        "C423",
+        "C408",
+    ]
+
+    assert main(["--select", "C401,C423", str(path)]) == 1
+    assert [line.split()[1] for line in capsys.readouterr().out.splitlines()] == [
+        "C423"
+    ]
+
+
+def test_main_noqa(tmp_path, capsys):
+    path = tmp_path / "example.py"
+    path.write_text("foo = list()  # noqa: C408\nbar = dict()  # noqa: C401\n")
+    (tmp_path / "analysis.ipynb").write_text(
+        notebook(("code", "a = list()  # noqa"), ("code", "b = dict()"))
+    )
+
+    assert main([str(tmp_path)]) == 1
+    assert capsys.readouterr().out.splitlines() == [
+        f"{path}:2:7: C408 Unnecessary dict call - rewrite as a literal.",
+        f"{tmp_path}/analysis.ipynb:cell_2:1:5: C408 Unnecessary dict call - "
+        + "rewrite as a literal.",
+    ]
+
+    assert main(["--disable-noqa", str(tmp_path)]) == 1
+    assert len(capsys.readouterr().out.splitlines()) == 4
+
+
+def test_main_jobs(tmp_path, capsys):
+    for i in range(5):
+        (tmp_path / f"mod{i}.py").write_text("foo = list()\n")
+
+    assert main(["--jobs", "2", str(tmp_path)]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        f"{tmp_path / f'mod{i}.py'}:1:7: C408 Unnecessary list call - "
+        + "rewrite as a literal."
+        for i in range(5)
+    ]
+
+
+def test_main_archives(tmp_path, capsys):
+    wheel = tmp_path / "example-1.0-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w") as zf:
+        zf.writestr("example/__init__.py", "foo = list()\n")
+        zf.writestr("example/data.txt", "foo = list()\n")
+        zf.writestr("example-1.0.dist-info/METADATA", "Name: example\n")
+    sdist_dir = tmp_path / "example-1.0"
+    sdist_dir.mkdir()
+    (sdist_dir / "setup.py").write_text("foo = dict()\n")
+    (sdist_dir / "README").write_text("foo = dict()\n")
+    sdist = tmp_path / "example-1.0.tar.gz"
+    with tarfile.open(sdist, "w:gz") as tf:
+        tf.add(sdist_dir, arcname="example-1.0")
+
+    assert main([str(wheel), str(sdist)]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        f"{wheel}!example/__init__.py:1:7: C408 Unnecessary list call - "
+        + "rewrite as a literal.",
+        f"{sdist}!example-1.0/setup.py:1:7: C408 Unnecessary dict call - "
+        + "rewrite as a literal.",
+    ]
+
+
+def test_main_archive_corrupt(tmp_path, capsys):
+    path = tmp_path / "broken.whl"
+    path.write_bytes(b"not a zip file")
+
+    assert main([str(path)]) == 0
+
+    assert capsys.readouterr().err == (
+        f"{path}: could not be read: File is not a zip file\n"
+    )
+
+
+def notebook(*cells: tuple[str, str | list[str]]) -> str:
+    return json.dumps(
+        {
+            "cells": [
+                {"cell_type": cell_type, "metadata": {}, "source": source}
+                for cell_type, source in cells
+            ],
+            "metadata": {},
+            "nbformat": 4,
+            "nbformat_minor": 5,
+        }
+    )
+
+
+def test_main_notebook(tmp_path, capsys):
+    (tmp_path / "analysis.ipynb").write_text(
+        notebook(
+            ("markdown", "# list()"),
+            ("code", ["%matplotlib inline\n", "import pandas as pd\n"]),
+            ("code", ["!pip install foo\n", "rows = list()\n"]),
+            ("code", "%%bash\necho $(list())"),
+            ("code", "if True:\n    df?\n    names = set(x for x in rows)"),
+        )
+    )
+    (tmp_path / "example.py").write_text("foo = dict()\n")
+
+    assert main([str(tmp_path)]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        f"{tmp_path}/example.py:1:7: C408 Unnecessary dict call - "
+        + "rewrite as a literal.",
+        f"{tmp_path}/analysis.ipynb:cell_3:2:8: C408 Unnecessary list call - "
+        + "rewrite as a literal.",
+        f"{tmp_path}/analysis.ipynb:cell_5:3:13: C401 Unnecessary generator - "
+        + "rewrite as a set comprehension.",
+    ]
+
+
+def test_main_notebook_invalid(tmp_path, capsys):
+    path = tmp_path / "broken.ipynb"
+    path.write_text("{")
+
+    assert main([str(path)]) == 0
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err.startswith(f"{path}: could not be checked: ")
+
+
+def test_notebook_checker_shadowed_across_cells():
+    checker = NotebookChecker()
+
+    results = checker.check(
+        notebook(
+            ("code", "foo = list()"),
+            ("code", "list = MyList"),
+        )
+    )
+
+    assert results == []
+
+
+def test_notebook_checker_syntax_error():
+    checker = NotebookChecker()
+
+    results = checker.check(notebook(("code", "foo = dict()"), ("code", "x = (")))
+
+    assert results == [
+        (1, 1, 6, "C408 Unnecessary dict call - rewrite as a literal."),
+        (2, 1, 4, "E999 SyntaxError: '(' was never closed"),
+    ]
+
+
+def test_notebook_checker_displayed_comprehension():
+    checker = NotebookChecker()
+
+    results = checker.check(
+        notebook(
+            ("code", "[print(x) for x in xs]\n[f(x) for x in xs]"),
+        )
+    )
+
+    assert results == [
+        (
+            1,
+            1,
+            0,
+            "C433 Unnecessary list comprehension - its result is unused, "
+            + "rewrite as a for loop.",
+        ),
+    ]
+
+
+def test_notebook_checker_magics_only_at_line_start():
+    checker = NotebookChecker()
+
+    results = checker.check(
+        notebook(
+            ("code", "if (a\n    != list()):\n    b = (a\n    % dict())"),
+            ("code", "if cond:  # really?\n    c = set([1])"),
+        )
+    )
+
+    assert results == [
+        (1, 2, 7, "C408 Unnecessary list call - rewrite as a literal."),
+        (1, 4, 6, "C408 Unnecessary dict call - rewrite as a literal."),
+        (2, 2, 8, "C405 Unnecessary list literal - rewrite as a set literal."),
+    ]
+
+
+def test_notebook_checker_caches_cells(monkeypatch):
+    checker = NotebookChecker()
+    checked = []
+    check_cell = checker.check_cell
+
+    def counting_check_cell(source: str) -> object:
+        checked.append(source)
+        return check_cell(source)
+
+    monkeypatch.setattr(checker, "check_cell", counting_check_cell)
+    first = notebook(("code", "a = list()"), ("code", "b = dict()"))
+    second = notebook(("code", "c = set([1])"))
+    checker.check(first, path="first.ipynb")
+    checker.check(second, path="second.ipynb")
+    checked.clear()
+
+    results = checker.check(
+        notebook(("code", "a = list()"), ("code", "b = tuple()")), path="first.ipynb"
+    )
+    checker.check(second, path="second.ipynb")
+
+    assert checked == ["b = tuple()"]
+    assert len(checker.cells["first.ipynb"]) == 2
+    assert results == [
+        (1, 1, 4, "C408 Unnecessary list call - rewrite as a literal."),
+        (2, 1, 4, "C408 Unnecessary tuple call - rewrite as a literal."),
+    ]
+
+
+def watch_args() -> argparse.Namespace:
+    return argparse.Namespace(
+        jobs=4,
+        threads=False,
+        large_file_bytes=None,
+        select=None,
+        extend_select=[],
+        disable_noqa=False,
+    )
+
+
+def write_later(path: Path, text: str) -> None:
+    # Bump the modification time, in case the file system's resolution is
+    # coarser than the time between writes.
+    mtime_ns = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+
+
+def test_watcher(tmp_path):
+    one = tmp_path / "one.py"
+    one.write_text("a = list()\nb = dict()\n")
+    two = tmp_path / "two.py"
+    two.write_text("c = tuple()\n")
+    watcher = Watcher([str(tmp_path)], watch_args())
+
+    added, removed = watcher.poll()
+
+    assert added == [
+        (str(one), 1, 4, "C408 Unnecessary list call - rewrite as a literal."),
+        (str(one), 2, 4, "C408 Unnecessary dict call - rewrite as a literal."),
+        (str(two), 1, 4, "C408 Unnecessary tuple call - rewrite as a literal."),
+    ]
+    assert removed == []
+
+    write_later(one, "a = []\nb = dict()\nc = list(x for x in y)\n")
+    two.unlink()
+    three = tmp_path / "three.ipynb"
+    write_later(three, notebook(("code", "d = dict()")))
+
+    added, removed = watcher.poll()
+
+    assert added == [
+        (
+            str(one),
+            3,
+            4,
+            "C400 Unnecessary generator - rewrite as a list comprehension.",
+        ),
+        (
+            f"{three}:cell_1",
+            1,
+            4,
+            "C408 Unnecessary dict call - rewrite as a literal.",
+        ),
+    ]
+    assert removed == [
+        (str(two), 1, 4, "C408 Unnecessary tuple call - rewrite as a literal."),
+        (str(one), 1, 4, "C408 Unnecessary list call - rewrite as a literal."),
+    ]
+
+    assert watcher.poll() == ([], [])
+
+
+def test_watcher_unchanged_not_rechecked(tmp_path, monkeypatch):
+    (tmp_path / "one.py").write_text("a = list()\n")
+    watcher = Watcher([str(tmp_path)], watch_args())
+    watcher.poll()
+    monkeypatch.setattr(
+        "flake8_comprehensions._watch.check_paths",
+        lambda *args: pytest.fail("unchanged file re-checked"),
+    )
+
+    assert watcher.poll() == ([], [])
+
+
+def test_main_watch(tmp_path, capsys, monkeypatch):
+    path = tmp_path / "example.py"
+    path.write_text("foo = list()\n")
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 1:
+            write_later(path, "foo = dict()\n")
+        else:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr("flake8_comprehensions._watch.time.sleep", sleep)
+
+    assert main(["--watch", str(tmp_path)]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        f"{path}:1:7: C408 Unnecessary list call - rewrite as a literal.",
+        f"- {path}:1:7: C408 Unnecessary list call - rewrite as a literal.",
+        f"+ {path}:1:7: C408 Unnecessary dict call - rewrite as a literal.",
+    ]
+
+
+def test_main_format_jsonl(tmp_path, capsys):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("a = list()\nb = dict()\n")
+    (tmp_path / "b.py").write_text("c = set(x for x in y)\n")
+
+    assert main(["--format", "jsonl", str(tmp_path)]) == 1
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert records == [
+        {
+            "type": "result",
+            "path": str(tmp_path / "b.py"),
+            "line": 1,
+            "column": 5,
+            "code": "C401",
+            "message": "Unnecessary generator - rewrite as a set comprehension.",
+        },
+        {
+            "type": "result",
+            "path": str(tmp_path / "pkg" / "a.py"),
+            "line": 1,
+            "column": 5,
+            "code": "C408",
+            "message": "Unnecessary list call - rewrite as a literal.",
+        },
+        {
+            "type": "result",
+            "path": str(tmp_path / "pkg" / "a.py"),
+            "line": 2,
+            "column": 5,
+            "code": "C408",
+            "message": "Unnecessary dict call - rewrite as a literal.",
+        },
+        {
+            "type": "summary",
+            "total": 3,
+            "codes": {"C401": 1, "C408": 2},
+            "directories": {str(tmp_path): 1, str(tmp_path / "pkg"): 2},
+        },
+    ]
+
+
+def test_main_format_jsonl_clean(tmp_path, capsys):
+    (tmp_path / "a.py").write_text("a = []\n")
+
+    assert main(["--format", "jsonl", str(tmp_path)]) == 0
+
+    assert json.loads(capsys.readouterr().out) == {
+        "type": "summary",
+        "total": 0,
+        "codes": {},
+        "directories": {},
+    }
+
+
+def test_main_format_sarif(tmp_path, capsys):
+    path = tmp_path / "a.py"
+    path.write_text("a = list()\nb = (\n")
+
+    assert main(["--format", "sarif", str(path)]) == 1
+
+    sarif = json.loads(capsys.readouterr().out)
+    assert sarif["version"] == "2.1.0"
+    (run,) = sarif["runs"]
+    assert run["tool"]["driver"]["name"] == "flake8-comprehensions"
+    assert run["results"] == [
+        {
+            "ruleId": "E999",
+            "level": "error",
+            "message": {"text": "SyntaxError: '(' was never closed"},
+            "locations": [
+                {
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": path.as_posix()},
+                        "region": {"startLine": 2, "startColumn": 5},
+                    }
+                }
+            ],
+        }
+    ]
+    assert run["properties"]["summary"] == {
+        "total": 1,
+        "codes": {"E999": 1},
+        "directories": {str(tmp_path): 1},
+    }
+
+
+def test_main_format_with_watch(tmp_path, capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        main(["--format", "jsonl", "--watch", str(tmp_path)])
+
+    assert excinfo.value.code == 2
+    assert "--format is only supported without" in capsys.readouterr().err
+
+
+def test_main_large_file_bytes(example, capsys):
+    assert main([str(example)]) == 1
+    expected = capsys.readouterr().out
+
+    assert main(["--large-file-bytes", "10", str(example)]) == 1
+
+    assert capsys.readouterr().out == expected
+
+
+def test_main_profile(example, tmp_path, capsys):
+    profile = tmp_path / "example.prof"
+    profiler = cProfile.Profile()
+    profiler.runcall(exec, compile(example.read_text(), str(example), "exec"), {})
+    profiler.dump_stats(profile)
+
+    assert main(["--profile", str(profile), str(example)]) == 1
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert re.fullmatch(
+        re.escape(
+            f"{example}:6:12: C400 Unnecessary generator - rewrite as a list "
+            + "comprehension. ("
+        )
+        + r"(?!0\.000)\d+\.\d{3}s in hot\)",
+        lines[0],
+    )
+    assert lines[1] == (
+        f"{example}:2:12: C401 Unnecessary generator - rewrite as a set "
+        + "comprehension. (0.000s in cold)"
+    )
+
+
+def test_main_profile_all_sources(tmp_path, capsys):
+    profile = tmp_path / "other.prof"
+    profiler = cProfile.Profile()
+    profiler.runcall(sorted, [2, 1])
+    profiler.dump_stats(profile)
+    (tmp_path / "broken.py").write_text("x = (\n")
+    (tmp_path / "analysis.ipynb").write_text(notebook(("code", "rows = list()")))
+
+    assert main(["--profile", str(profile), "--jobs", "2", str(tmp_path)]) == 1
+
+    assert capsys.readouterr().out.splitlines() == [
+        f"{tmp_path}/analysis.ipynb:cell_1:1:8: C408 Unnecessary list call - "
+        + "rewrite as a literal. (0.000s in <module>)",
+        f"{tmp_path}/broken.py:1:5: E999 SyntaxError: '(' was never closed "
+        + "(0.000s in <module>)",
+    ]
+
+
+@pytest.mark.parametrize("code", sorted(rewrites))
+def test_benchmark_rewrites(code):
+    before, after = rewrites[code]
+    setup = "items: list[int] = []\n"
+
+    def codes(stmt: str) -> list[str]:
+        tree = ast.parse(setup + stmt)
+        return [message[:4] for _, _, message, _ in ComprehensionChecker(tree).run()]
+
+    assert code in codes(before)
+    assert code not in codes(after)
+
+
+def test_main_benchmark(tmp_path, capsys):
+    path = tmp_path / "example.py"
+    path.write_text("foo = list(x for x in y)\nbar = list(x for x in z)\n")
+
+    assert main(["--benchmark", "--benchmark-size", "10", str(path)]) == 1
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 3
+    assert re.fullmatch(
+        r"C400: 2 results, rewrite measured \d+\.\d{2}x as fast with 10 items",
+        lines[2],
+    )